@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True, scope='session')
+def yatube_test_settings():
+    """Те же изменения настроек, что и у manage.py test."""
+    from core.testing import test_settings
+    with test_settings():
+        yield
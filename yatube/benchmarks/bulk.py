@@ -0,0 +1,265 @@
+"""
+Массовое наполнение базы для нагрузочных прогонов и оценки ёмкости.
+
+Строки создаются порциями (CHUNK_SIZE) с явными первичными ключами:
+порции не зависят друг от друга, комментарии и подписки ссылаются на
+посты и пользователей по вычисленным ключам без чтения из базы.
+Генератор случайных чисел каждой порции получает своё зерно из
+(seed, таблица, номер порции), поэтому результат одинаков при любом
+числе процессов. Каждая порция пишется bulk_create в своей транзакции.
+SQLite допускает только одного пишущего, поэтому для неё порции идут
+последовательно; для остальных СУБД — в пуле процессов.
+"""
+import random
+from bisect import bisect
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import accumulate
+
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from posts import counters, feed
+from posts.cache import bump_generation
+from posts.models import Comment, Follow, Group, Post, User
+
+from .dataset import explicit_dates, make_images, power_law_weights
+
+# Строк в одной порции и в одном INSERT
+CHUNK_SIZE: int = 50000
+BATCH_SIZE: int = 1000
+# Насколько комментарии смещены к свежим постам
+COMMENT_SKEW: float = 3.0
+# Форма распределения Парето для числа подписок пользователя
+PARETO_SHAPE: float = 1.5
+TEXTS: int = 200
+# На сколько дней назад растягиваются даты постов
+SPAN_DAYS: int = 365
+
+
+class Plan:
+    """Параметры наполнения, общие для всех порций."""
+    def __init__(self, users, groups, posts, comments, follows, seed,
+                 image_ratio=0.0):
+        self.users = users
+        self.groups = groups
+        self.posts = posts
+        self.comments = comments
+        self.follows = follows
+        self.seed = seed
+        self.image_ratio = image_ratio
+        self.now = timezone.now()
+        fake = Faker('ru_RU')
+        fake.seed_instance(seed)
+        self.texts = [fake.paragraph(nb_sentences=5) for _ in range(TEXTS)]
+        self.names = [
+            (fake.first_name(), fake.last_name()) for _ in range(TEXTS)
+        ]
+        self.images = []
+        # ключи продолжают уже существующие строки
+        self.first = {
+            model: (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+            for model in (User, Group, Post, Comment, Follow)
+        }
+        # накопленные веса степенного закона для выбора через bisect
+        self.weights = list(accumulate(power_law_weights(users)))
+        # Число подписчиков не связано с числом постов автора: иначе
+        # самые плодовитые авторы раскладывали бы почти все посты в
+        # ленты почти всех читателей
+        self.popular = list(range(users))
+        self.rnd('popular', 0).shuffle(self.popular)
+
+    def rnd(self, table, chunk):
+        return random.Random(f'{self.seed}:{table}:{chunk}')
+
+    def _rank(self, rnd):
+        position = bisect(self.weights, rnd.random() * self.weights[-1])
+        return min(position, self.users - 1)
+
+    def author_id(self, rnd):
+        """Автор поста: немногие авторы пишут большую часть постов."""
+        return self.first[User] + self._rank(rnd)
+
+    def followed_id(self, rnd):
+        """Автор подписки: немногие авторы собирают большинство."""
+        return self.first[User] + self.popular[self._rank(rnd)]
+
+
+def _chunks(total):
+    return [
+        (start, min(start + CHUNK_SIZE, total))
+        for start in range(0, total, CHUNK_SIZE)
+    ]
+
+
+def _insert(model, rows):
+    # Django 2.2 не ограничивает явный batch_size пределами СУБД
+    batch_size = min(BATCH_SIZE, connection.ops.bulk_batch_size(
+        model._meta.concrete_fields, rows
+    ))
+    with transaction.atomic():
+        model.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def users_chunk(plan, chunk, start, stop):
+    rnd = plan.rnd('users', chunk)
+    rows = []
+    for number in range(start, stop):
+        first_name, last_name = rnd.choice(plan.names)
+        rows.append(User(
+            pk=plan.first[User] + number,
+            username=f'seed_{plan.seed}_{plan.first[User] + number}',
+            first_name=first_name,
+            last_name=last_name,
+            # вход по паролю для таких пользователей невозможен
+            password='!',
+            date_joined=plan.now,
+        ))
+    return _insert(User, rows)
+
+
+def posts_chunk(plan, chunk, start, stop):
+    rnd = plan.rnd('posts', chunk)
+    step = timedelta(days=SPAN_DAYS) / max(plan.posts, 1)
+    rows = []
+    for number in range(start, stop):
+        pub_date = plan.now - step * (plan.posts - number)
+        rows.append(Post(
+            pk=plan.first[Post] + number,
+            author_id=plan.author_id(rnd),
+            group_id=(
+                plan.first[Group] + rnd.randrange(plan.groups)
+                if plan.groups and rnd.random() < 0.7 else None
+            ),
+            text=rnd.choice(plan.texts),
+            image=(
+                rnd.choice(plan.images)
+                if plan.images and rnd.random() < plan.image_ratio else ''
+            ),
+            pub_date=pub_date,
+            updated=pub_date,
+        ))
+    with explicit_dates():
+        return _insert(Post, rows)
+
+
+def comments_chunk(plan, chunk, start, stop):
+    rnd = plan.rnd('comments', chunk)
+    rows = []
+    for number in range(start, stop):
+        # чем свежее пост, тем больше у него комментариев
+        offset = int(plan.posts * rnd.random() ** COMMENT_SKEW)
+        post_id = plan.first[Post] + plan.posts - 1 - offset
+        rows.append(Comment(
+            pk=plan.first[Comment] + number,
+            post_id=post_id,
+            author_id=plan.first[User] + rnd.randrange(plan.users),
+            text=rnd.choice(plan.texts)[:200],
+            created=plan.now - timedelta(seconds=offset),
+        ))
+    with explicit_dates():
+        return _insert(Comment, rows)
+
+
+def follows_chunk(plan, chunk, start, stop):
+    """Подписки пользователей с номерами [start, stop)."""
+    rnd = plan.rnd('follows', chunk)
+    # среднее распределения Парето — shape / (shape - 1)
+    scale = plan.follows * (PARETO_SHAPE - 1) / PARETO_SHAPE
+    rows = []
+    for number in range(start, stop):
+        user_id = plan.first[User] + number
+        wanted = min(
+            int(scale * rnd.paretovariate(PARETO_SHAPE)), plan.users - 1
+        )
+        authors = set()
+        for _ in range(wanted * 2):
+            if len(authors) == wanted:
+                break
+            author_id = plan.followed_id(rnd)
+            if author_id != user_id:
+                authors.add(author_id)
+        rows.extend(
+            Follow(user_id=user_id, author_id=author_id)
+            for author_id in sorted(authors)
+        )
+    return _insert(Follow, rows)
+
+
+def reset_sequences():
+    """Сдвигает последовательности ключей за вставленные явно ключи."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [User, Group, Post, Comment, Follow]
+    )
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def _run_chunk(job):
+    function, plan, chunk, start, stop = job
+    try:
+        return function(plan, chunk, start, stop)
+    finally:
+        connections.close_all()
+
+
+def parallel_allowed():
+    return connection.vendor != 'sqlite'
+
+
+def run(function, plan, total, workers=1):
+    """Выполняет function по всем порциям; возвращает число строк."""
+    jobs = [
+        (function, plan, chunk, start, stop)
+        for chunk, (start, stop) in enumerate(_chunks(total))
+    ]
+    if workers <= 1 or not parallel_allowed() or len(jobs) < 2:
+        return sum(function(*job[1:]) for job in jobs)
+    # дочерние процессы не должны наследовать открытые подключения
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(_run_chunk, jobs))
+
+
+def seed(users, groups, posts, comments, follows=10, seed=1,
+         image_ratio=0.0, workers=1, report=None):
+    """
+    Наполняет базу и пересчитывает производные данные: счётчики,
+    ленты подписок и поколение кеша страниц. report(название, строк)
+    вызывается после каждой таблицы; возвращает число строк таблиц.
+    """
+    counts = {}
+
+    def done(name, rows):
+        counts[name] = rows
+        if report is not None:
+            report(name, rows)
+
+    plan = Plan(users, groups, posts, comments, follows, seed, image_ratio)
+    if image_ratio:
+        plan.images = make_images(random.Random(seed))
+    done('users', run(users_chunk, plan, users, workers))
+    Group.objects.bulk_create(
+        Group(
+            pk=plan.first[Group] + number,
+            title=f'Группа {plan.first[Group] + number}',
+            slug=f'seed-{plan.seed}-{plan.first[Group] + number}',
+            description=plan.texts[number % TEXTS],
+        )
+        for number in range(groups)
+    )
+    done('groups', groups)
+    done('posts', run(posts_chunk, plan, posts, workers))
+    if posts:
+        done('comments', run(comments_chunk, plan, comments, workers))
+    done('follows', run(follows_chunk, plan, users, workers))
+    reset_sequences()
+    done('counters', sum(counters.repair().values()))
+    done('feed', feed.rebuild())
+    bump_generation()
+    return counts
@@ -0,0 +1,154 @@
+"""
+Сравнение WSGI-воркеров и ASGI-моста при медленном вводе-выводе.
+
+Каждый SQL-запрос задерживается на slow_query секунд, как чтение
+SQLite с медленного диска. На стороне WSGI concurrency синхронных
+воркеров держат каждый свой запрос от начала до конца (load.run);
+на стороне ASGI clients одновременных клиентов обращаются к
+core.asgi.WsgiBridge, который выполняет запросы в пуле из threads
+потоков.
+"""
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.db.backends.signals import connection_created
+from django.test import Client
+
+from core.asgi import WsgiBridge
+
+from . import load
+
+
+class SlowQueries:
+    """Обёртка выполнения SQL, добавляющая задержку к каждому запросу."""
+    def __init__(self, delay):
+        self.delay = delay
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.delay)
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def slow_queries(delay):
+    """Замедляет подключения к базе, открытые внутри блока."""
+    wrapper = SlowQueries(delay)
+
+    def install(sender, connection, **kwargs):
+        # объект подключения переживает переподключение после запроса
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    connection_created.connect(install, weak=False)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(install)
+
+
+async def get(application, url, cookie=None):
+    """GET через ASGI-приложение; возвращает статус ответа."""
+    path, _, query = url.partition('?')
+    headers = [(b'host', b'localhost')]
+    if cookie:
+        headers.append((b'cookie', cookie.encode()))
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(
+        {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': query.encode(),
+            'headers': headers,
+            'server': ('localhost', 80),
+            'client': ('127.0.0.1', 0),
+        },
+        receive,
+        send,
+    )
+    return messages[0]['status']
+
+
+def session_cookie(user):
+    client = Client()
+    client.force_login(user)
+    name = settings.SESSION_COOKIE_NAME
+    return f'{name}={client.cookies[name].value}'
+
+
+async def _client(application, targets, cookie, budget, samples):
+    while budget():
+        name = targets.pick()
+        start = time.perf_counter()
+        status = await get(
+            application,
+            targets.url(name),
+            cookie if name in load.LOGIN_REQUIRED else None,
+        )
+        samples.append((name, status, time.perf_counter() - start, None))
+
+
+def run_asgi(requests=1000, clients=32, threads=8, warmup=100, seed=1):
+    """Аналог load.run для ASGI-моста; сводка в том же формате."""
+    rnd = random.Random(seed)
+    targets = load.Targets(rnd)
+    cache.clear()
+    cookies = [
+        session_cookie(rnd.choice(targets.readers))
+        if targets.readers else None
+        for _ in range(clients)
+    ]
+    application = WsgiBridge(WSGIHandler(), threads)
+
+    async def execute(total):
+        remaining = [total]
+
+        def budget():
+            remaining[0] -= 1
+            return remaining[0] >= 0
+
+        samples = []
+        await asyncio.gather(*(
+            _client(application, targets, cookie, budget, samples)
+            for cookie in cookies
+        ))
+        return samples
+
+    try:
+        asyncio.run(execute(warmup))
+        start = time.perf_counter()
+        samples = asyncio.run(execute(requests))
+        wall = time.perf_counter() - start
+    finally:
+        application.executor.shutdown()
+    return load.summarize(samples, wall)
+
+
+def compare(requests=1000, concurrency=4, clients=32, threads=8,
+            slow_query=0.02, warmup=100, seed=1):
+    """Прогоняет одинаковую нагрузку через WSGI и через ASGI-мост."""
+    with slow_queries(slow_query):
+        wsgi = load.run(
+            requests=requests, concurrency=concurrency, warmup=warmup,
+            seed=seed,
+        )
+        asgi = run_asgi(
+            requests=requests, clients=clients, threads=threads,
+            warmup=warmup, seed=seed,
+        )
+    return {
+        'wsgi': {'workers': concurrency, **wsgi},
+        'asgi': {'clients': clients, 'threads': threads, **asgi},
+    }
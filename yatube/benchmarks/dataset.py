@@ -0,0 +1,55 @@
+"""
+Общие части наполнения базы для нагрузочных прогонов (см. bulk).
+
+Популярность авторов распределена по степенному закону: немногие
+авторы пишут большую часть постов и собирают большую часть
+подписчиков, как на живом сайте.
+"""
+from contextlib import contextmanager
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from posts.models import Comment, Post
+
+# Показатель степенного закона для популярности авторов
+ALPHA: float = 1.2
+# Сколько разных картинок делится между постами
+IMAGES: int = 5
+
+
+@contextmanager
+def explicit_dates():
+    """Позволяет задать даты, которые обычно ставит auto_now(_add)."""
+    fields = [
+        Post._meta.get_field('pub_date'),
+        Post._meta.get_field('updated'),
+        Comment._meta.get_field('created'),
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def power_law_weights(count):
+    return [1 / (rank + 1) ** ALPHA for rank in range(count)]
+
+
+def make_images(rnd):
+    """Сохраняет IMAGES картинок-заливок и возвращает их имена."""
+    names = []
+    for number in range(IMAGES):
+        buffer = BytesIO()
+        color = tuple(rnd.randrange(256) for _ in range(3))
+        Image.new('RGB', (1280, 720), color).save(buffer, 'JPEG')
+        names.append(default_storage.save(
+            f'posts/benchmark_{number}.jpg', ContentFile(buffer.getvalue())
+        ))
+    return names
@@ -0,0 +1,197 @@
+"""
+Локальный генератор нагрузки на маршруты posts, users и about.
+
+Запросы идут через тестовый клиент Django, то есть через все
+middleware, но без сетевого сервера. Каждый поток берёт маршрут по
+весам из MIX и считает время ответа и число SQL-запросов к нему.
+"""
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from core.queries import QueryRecorder
+from posts.models import Follow, Group, Post, User
+
+# Доли маршрутов в потоке запросов
+MIX = {
+    'posts:index': 30,
+    'posts:post_detail': 25,
+    'posts:profile': 15,
+    'posts:group_list': 10,
+    'posts:follow_index': 10,
+    'posts:search': 4,
+    'users:login': 2,
+    'users:signup': 2,
+    'about:author': 1,
+    'about:tech': 1,
+}
+# Страницы, которые читатель открывает, войдя на сайт
+LOGIN_REQUIRED = ('posts:follow_index',)
+# Сколько объектов каждого вида берётся для адресов
+SAMPLE: int = 200
+SEARCH_TERMS = ('пост', 'город', 'время', 'работа', 'жизнь')
+
+
+def percentile(values, q):
+    """Процентиль методом ближайшего ранга; values отсортированы."""
+    if not values:
+        return None
+    return values[max(math.ceil(q / 100 * len(values)) - 1, 0)]
+
+
+class Targets:
+    """Адреса маршрутов на реальных объектах из базы."""
+    def __init__(self, rnd):
+        self.rnd = rnd
+        self.posts = list(
+            Post.objects.values_list('pk', flat=True)[:SAMPLE]
+        )
+        self.groups = list(Group.objects.values_list('slug', flat=True))
+        self.authors = list(
+            User.objects.filter(posts__isnull=False)
+            .values_list('username', flat=True).distinct()[:SAMPLE]
+        )
+        self.readers = list(
+            User.objects.filter(
+                pk__in=Follow.objects.values('user')
+            )[:SAMPLE]
+        )
+        self.names = [name for name in MIX if self.available(name)]
+        self.weights = [MIX[name] for name in self.names]
+
+    def available(self, name):
+        return {
+            'posts:post_detail': self.posts,
+            'posts:profile': self.authors,
+            'posts:group_list': self.groups,
+            'posts:follow_index': self.readers,
+        }.get(name, True)
+
+    def url(self, name):
+        choice = self.rnd.choice
+        if name == 'posts:post_detail':
+            return reverse(name, kwargs={'post_id': choice(self.posts)})
+        if name == 'posts:profile':
+            return reverse(name, kwargs={'username': choice(self.authors)})
+        if name == 'posts:group_list':
+            return reverse(name, kwargs={'slug': choice(self.groups)})
+        if name == 'posts:search':
+            return f'{reverse(name)}?q={choice(SEARCH_TERMS)}'
+        return reverse(name)
+
+    def pick(self):
+        return self.rnd.choices(self.names, self.weights)[0]
+
+
+def _worker(targets, reader, budget, results, lock):
+    anonymous = Client(SERVER_NAME='localhost')
+    member = Client(SERVER_NAME='localhost')
+    if reader is not None:
+        member.force_login(reader)
+    samples = []
+    try:
+        while budget():
+            name = targets.pick()
+            url = targets.url(name)
+            client = member if name in LOGIN_REQUIRED else anonymous
+            with QueryRecorder() as recorder:
+                start = time.perf_counter()
+                response = client.get(url)
+                elapsed = time.perf_counter() - start
+            samples.append(
+                (name, response.status_code, elapsed, recorder.count)
+            )
+    finally:
+        # у каждого потока свои подключения к базе
+        connections.close_all()
+        with lock:
+            results.extend(samples)
+
+
+def run(requests=1000, concurrency=4, warmup=100, seed=1):
+    """
+    Выполняет requests запросов в concurrency потоков и возвращает
+    сводку по маршрутам: задержки в миллисекундах, запросы в секунду,
+    SQL-запросы на ответ и число ошибок (ответы 5xx).
+    """
+    rnd = random.Random(seed)
+    targets = Targets(rnd)
+    cache.clear()
+    lock = threading.Lock()
+
+    def counter(total):
+        remaining = [total]
+
+        def budget():
+            with lock:
+                remaining[0] -= 1
+                return remaining[0] >= 0
+        return budget
+
+    def readers():
+        return [
+            rnd.choice(targets.readers) if targets.readers else None
+            for _ in range(concurrency)
+        ]
+
+    def execute(total):
+        results = []
+        budget = counter(total)
+        if concurrency == 1:
+            _worker(targets, readers()[0], budget, results, lock)
+            return results
+        threads = [
+            threading.Thread(
+                target=_worker,
+                args=(targets, reader, budget, results, lock),
+            )
+            for reader in readers()
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    execute(warmup)
+    start = time.perf_counter()
+    samples = execute(requests)
+    wall = time.perf_counter() - start
+    return summarize(samples, wall)
+
+
+def _stats(samples, wall):
+    latencies = sorted(elapsed * 1000 for _, _, elapsed, _ in samples)
+    # None — число запросов неизвестно (запрос шёл в другом потоке)
+    queries = [count for _, _, _, count in samples if count is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, status, _, _ in samples if status >= 500),
+        'rps': round(len(samples) / wall, 2) if wall else None,
+        'p50': round(percentile(latencies, 50), 2),
+        'p95': round(percentile(latencies, 95), 2),
+        'p99': round(percentile(latencies, 99), 2),
+        'queries_per_request': round(
+            sum(queries) / len(queries), 2
+        ) if queries else None,
+    }
+
+
+def summarize(samples, wall):
+    by_view = defaultdict(list)
+    for sample in samples:
+        by_view[sample[0]].append(sample)
+    return {
+        'wall_seconds': round(wall, 3),
+        'total': _stats(samples, wall) if samples else None,
+        'views': {
+            name: _stats(rows, wall) for name, rows in sorted(by_view.items())
+        },
+    }
@@ -0,0 +1,160 @@
+import json
+import os
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import (
+    override_settings, setup_databases, teardown_databases,
+)
+from django.utils import timezone
+
+from benchmarks import bulk, load
+from posts.models import Post
+
+
+def isolated_caches(workdir):
+    """Те же бэкенды кеша, но с файлами внутри workdir."""
+    caches = {}
+    for alias, config in settings.CACHES.items():
+        config = dict(config)
+        if config.get('LOCATION'):
+            config['LOCATION'] = os.path.join(
+                workdir, 'cache', os.path.basename(config['LOCATION'])
+            )
+        caches[alias] = config
+    return caches
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет отдельную базу воспроизводимым набором данных и '
+        'нагружает страницы сайта; результат — JSON с p50/p95/p99, '
+        'запросами в секунду и SQL-запросами на ответ по маршрутам'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=5000)
+        parser.add_argument(
+            '--follows', type=int, default=10,
+            help='Среднее число подписок пользователя',
+        )
+        parser.add_argument(
+            '--images', type=float, default=0.2,
+            help='Доля постов с картинкой',
+        )
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--warmup', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--workdir',
+            help='Каталог для базы и картинок; с ним набор данных '
+                 'сохраняется и переиспользуется следующими прогонами',
+        )
+        parser.add_argument(
+            '--output', help='Файл для JSON, по умолчанию stdout'
+        )
+        parser.add_argument(
+            '--compare', help='JSON прошлого прогона для сравнения'
+        )
+
+    def handle(self, *args, **options):
+        keep = bool(options['workdir'])
+        if keep:
+            os.makedirs(options['workdir'], exist_ok=True)
+            workdir = options['workdir']
+        else:
+            temporary = tempfile.TemporaryDirectory()
+            workdir = temporary.name
+        # прогон идёт в своей базе и своём кеше: рабочие данные
+        # и закешированные страницы сайта не трогаются
+        connections['default'].settings_dict['TEST']['NAME'] = os.path.join(
+            workdir, 'benchmark.sqlite3'
+        )
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=keep
+        )
+        try:
+            with override_settings(
+                DEBUG=False,
+                MEDIA_ROOT=os.path.join(workdir, 'media'),
+                CACHES=isolated_caches(workdir),
+            ):
+                report = self.benchmark(options)
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=keep)
+            if not keep:
+                temporary.cleanup()
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+        if options['compare']:
+            with open(options['compare']) as file:
+                self.compare(json.load(file), report)
+
+    def seed(self, options):
+        parameters = {
+            name: options[name]
+            for name in (
+                'users', 'groups', 'posts', 'comments', 'follows', 'seed'
+            )
+        }
+        parameters['image_ratio'] = options['images']
+        if Post.objects.exists():
+            self.stderr.write('Набор данных уже есть в базе, наполнение '
+                              'пропущено')
+        else:
+            bulk.seed(**parameters)
+        return parameters
+
+    def benchmark(self, options):
+        parameters = self.seed(options)
+        result = load.run(
+            requests=options['requests'],
+            concurrency=options['concurrency'],
+            warmup=options['warmup'],
+            seed=options['seed'],
+        )
+        return {
+            'commit': git_commit(),
+            'started': timezone.now().isoformat(),
+            'dataset': parameters,
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            **result,
+        }
+
+    def compare(self, before, after):
+        """Печатает изменение p95 и запросов в секунду по маршрутам."""
+        self.stderr.write(
+            f'{before.get("commit")} -> {after.get("commit")}'
+        )
+        for name, stats in after['views'].items():
+            old = before.get('views', {}).get(name)
+            if not old:
+                continue
+            self.stderr.write(
+                f'{name}: p95 {old["p95"]} -> {stats["p95"]} мс, '
+                f'rps {old["rps"]} -> {stats["rps"]}, '
+                f'SQL {old["queries_per_request"]} -> '
+                f'{stats["queries_per_request"]}'
+            )
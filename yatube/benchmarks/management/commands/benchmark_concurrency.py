@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.utils import timezone
+
+from benchmarks import concurrency
+
+from .benchmark import Command as BenchmarkCommand, git_commit
+
+SIDES = ('wsgi', 'asgi')
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнивает синхронные WSGI-воркеры (--concurrency) и ASGI-мост '
+        '(--clients клиентов, --threads потоков) на одной нагрузке, '
+        'когда каждый SQL-запрос задержан на --slow-query мс'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--clients', type=int, default=32)
+        parser.add_argument(
+            '--threads', type=int, default=settings.ASGI_THREADS
+        )
+        parser.add_argument(
+            '--slow-query', type=float, default=20,
+            help='Задержка каждого SQL-запроса, мс',
+        )
+
+    def benchmark(self, options):
+        parameters = self.seed(options)
+        result = concurrency.compare(
+            requests=options['requests'],
+            concurrency=options['concurrency'],
+            clients=options['clients'],
+            threads=options['threads'],
+            slow_query=options['slow_query'] / 1000,
+            warmup=options['warmup'],
+            seed=options['seed'],
+        )
+        wsgi, asgi = result['wsgi']['total'], result['asgi']['total']
+        self.stderr.write(
+            f'WSGI: rps {wsgi["rps"]}, p95 {wsgi["p95"]} мс; '
+            f'ASGI: rps {asgi["rps"]}, p95 {asgi["p95"]} мс'
+        )
+        return {
+            'commit': git_commit(),
+            'started': timezone.now().isoformat(),
+            'dataset': parameters,
+            'requests': options['requests'],
+            'slow_query_ms': options['slow_query'],
+            **result,
+        }
+
+    def compare(self, before, after):
+        for side in SIDES:
+            self.stderr.write(side)
+            super().compare(
+                {'commit': before.get('commit'), **before[side]},
+                {'commit': after.get('commit'), **after[side]},
+            )
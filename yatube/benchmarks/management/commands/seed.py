@@ -0,0 +1,70 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from benchmarks import bulk
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро наполняет базу пользователями, группами, постами, '
+        'комментариями и подписками порциями bulk_create'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument(
+            '--follows', type=int, default=10,
+            help='Среднее число подписок пользователя',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--images', type=float, default=0.0,
+            help='Доля постов с картинкой',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Процессы для порций; для SQLite всегда один',
+        )
+
+    def handle(self, *args, **options):
+        if options['posts'] and not options['users']:
+            raise CommandError('Для постов нужен хотя бы один пользователь')
+        if not bulk.parallel_allowed() and options['workers'] > 1:
+            self.stderr.write(
+                'SQLite допускает одного пишущего: порции идут '
+                'последовательно'
+            )
+        started = time.perf_counter()
+        last = [started]
+
+        def report(name, rows):
+            now = time.perf_counter()
+            elapsed = now - last[0]
+            last[0] = now
+            speed = rows / elapsed if elapsed else 0
+            self.stdout.write(
+                f'{name}: {rows} строк за {elapsed:.1f} с ({speed:.0f}/с)'
+            )
+
+        # при DEBUG каждый INSERT форматировался бы и копился в памяти
+        with override_settings(DEBUG=False):
+            bulk.seed(
+                users=options['users'],
+                groups=options['groups'],
+                posts=options['posts'],
+                comments=options['comments'],
+                follows=options['follows'],
+                seed=options['seed'],
+                image_ratio=options['images'],
+                workers=options['workers'],
+                report=report,
+            )
+        self.stdout.write(
+            f'Готово за {time.perf_counter() - started:.1f} с'
+        )
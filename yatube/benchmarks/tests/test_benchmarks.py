@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.db.models import Count
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from posts.models import Comment, FeedEntry, Follow, Post, User
+
+from .. import bulk, concurrency, load
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class BenchmarkTest(TestCase):
+    """TestCase для набора данных и генератора нагрузки"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.counts = bulk.seed(
+            users=30, groups=3, posts=200, comments=300, seed=7,
+            image_ratio=0.2,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_seed(self):
+        """Набор данных создан, счётчики и ленты заполнены"""
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertEqual(Follow.objects.count(), self.counts['follows'])
+        self.assertTrue(
+            Post.objects.exclude(image='').exists(),
+            'В наборе нет постов с картинками'
+        )
+        self.assertEqual(
+            sum(User.objects.values_list('stats__posts_count', flat=True)),
+            200,
+            'Счётчики постов не пересчитаны после bulk_create'
+        )
+        self.assertTrue(FeedEntry.objects.exists(), 'Ленты не заполнены')
+
+    def test_follow_graph_is_skewed(self):
+        """Подписчики распределены неравномерно"""
+        followers = sorted(
+            Follow.objects.values('author').annotate(
+                total=Count('pk')
+            ).values_list('total', flat=True),
+            reverse=True,
+        )
+        self.assertGreater(
+            followers[0], 3 * followers[len(followers) // 2],
+            'У самого популярного автора не больше подписчиков, чем у '
+            'типичного'
+        )
+
+    def test_run_reports_percentiles(self):
+        """Прогон возвращает задержки и запросы по маршрутам"""
+        report = load.run(requests=40, concurrency=1, warmup=0, seed=3)
+        self.assertEqual(report['total']['requests'], 40)
+        self.assertEqual(report['total']['errors'], 0)
+        for name, stats in report['views'].items():
+            with self.subTest(view=name):
+                self.assertIn(name, load.MIX)
+                self.assertLessEqual(stats['p50'], stats['p95'])
+                self.assertLessEqual(stats['p95'], stats['p99'])
+                self.assertGreaterEqual(stats['queries_per_request'], 0)
+
+    def test_percentile(self):
+        """Процентиль по ближайшему рангу"""
+        values = list(range(1, 101))
+        self.assertEqual(load.percentile(values, 50), 50)
+        self.assertEqual(load.percentile(values, 99), 99)
+        self.assertEqual(load.percentile([5], 95), 5)
+        self.assertIsNone(load.percentile([], 50))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ConcurrencyTest(TransactionTestCase):
+    """TestCase для сравнения WSGI и ASGI при медленной базе"""
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_compare(self):
+        """Обе стороны обрабатывают одинаковую нагрузку без ошибок"""
+        bulk.seed(users=10, groups=2, posts=40, comments=20, seed=7)
+        report = concurrency.compare(
+            requests=30, concurrency=1, clients=4, threads=2,
+            slow_query=0.001, warmup=0, seed=3,
+        )
+        for side in ('wsgi', 'asgi'):
+            with self.subTest(side=side):
+                self.assertEqual(report[side]['total']['requests'], 30)
+                self.assertEqual(report[side]['total']['errors'], 0)
+        self.assertIsNone(report['asgi']['total']['queries_per_request'])
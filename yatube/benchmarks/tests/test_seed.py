@@ -0,0 +1,80 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import counters
+from posts.models import Comment, FeedEntry, Follow, Group, Post, User
+
+from .. import bulk
+
+
+@mock.patch.object(bulk, 'CHUNK_SIZE', 100)
+class SeedTest(TestCase):
+    """TestCase для массового наполнения базы"""
+    def seed(self, **kwargs):
+        options = dict(
+            users=20, groups=2, posts=250, comments=300, follows=4, seed=5
+        )
+        options.update(kwargs)
+        bulk.seed(**options)
+
+    def snapshot(self):
+        first_user = User.objects.order_by('pk').first().pk
+        return [
+            (author_id - first_user, text)
+            for author_id, text in Post.objects.order_by('pk').values_list(
+                'author_id', 'text'
+            )
+        ]
+
+    def test_seed_creates_consistent_data(self):
+        """Строки созданы, счётчики сходятся, ленты заполнены"""
+        self.seed()
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 250)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertTrue(Follow.objects.exists())
+        self.assertEqual(
+            counters.repair(),
+            {name: 0 for name, *_ in counters.counters()},
+            'Счётчики разошлись с данными после наполнения'
+        )
+        self.assertEqual(
+            FeedEntry.objects.count(),
+            Post.objects.filter(
+                author__following__isnull=False
+            ).count(),
+            'Ленты не соответствуют подпискам'
+        )
+
+    def test_seed_is_deterministic(self):
+        """Одно и то же зерно даёт те же данные"""
+        self.seed()
+        first = self.snapshot()
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        self.seed()
+        self.assertEqual(self.snapshot(), first)
+
+    def test_seed_continues_existing_keys(self):
+        """Повторное наполнение дописывает строки после существующих"""
+        self.seed()
+        self.seed(seed=6)
+        self.assertEqual(Post.objects.count(), 500)
+        post = Post.objects.create(
+            author=User.objects.first(), text='Обычный пост'
+        )
+        self.assertEqual(post.pk, 501)
+
+    def test_command(self):
+        """Команда seed печатает отчёт по таблицам"""
+        out = StringIO()
+        call_command(
+            'seed', users=5, groups=1, posts=30, comments=10,
+            workers=1, stdout=out,
+        )
+        self.assertIn('posts: 30', out.getvalue())
+        self.assertEqual(Post.objects.count(), 30)
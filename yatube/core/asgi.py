@@ -0,0 +1,204 @@
+"""
+ASGI-приложение поверх WSGI-обработчика Django.
+
+Django 2.2 не умеет ни ASGI, ни асинхронные представления. Мост
+принимает соединения в цикле событий, а сам запрос выполняет
+в ограниченном пуле потоков: ожидающие и медленные клиенты не держат
+потоки, а одновременных обращений к базе не больше ASGI_THREADS.
+Тело запроса копится в SpooledTemporaryFile, потоковый ответ читается
+по частям, и на время отправки каждой части поток свободен. Потоковый
+ответ с методом async_stream(run) (например, posts.events) читается
+прямо в цикле событий, а run выполняет в пуле его обращения к базе.
+"""
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+
+# Заголовки, которые WSGI передаёт без префикса HTTP_
+UNPREFIXED = {'CONTENT_TYPE', 'CONTENT_LENGTH'}
+
+
+class WsgiBridge:
+    """ASGI 3 приложение, выполняющее WSGI-обработчик в пуле потоков."""
+    def __init__(self, application=None, threads=None):
+        self.application = application or WSGIHandler()
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads or settings.ASGI_THREADS,
+            thread_name_prefix='asgi',
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        else:
+            raise ValueError(f'Неподдерживаемое соединение {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # дождаться запросов, которые ещё выполняются в пуле
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.executor.shutdown
+                )
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def read_body(receive):
+        """Тело запроса в файле; None, если клиент отключился."""
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        body.seek(0)
+        return body
+
+    @staticmethod
+    def environ(scope, body):
+        path = scope['path']
+        root_path = scope.get('root_path', '')
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        body.seek(0, 2)
+        length = body.tell()
+        body.seek(0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': root_path.encode().decode('latin-1'),
+            # WSGI передаёт байты пути строкой latin-1
+            'PATH_INFO': path.encode().decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            # длина известна и для тела, пришедшего частями без
+            # Content-Length
+            'CONTENT_LENGTH': str(length),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', ()):
+            key = name.decode('latin-1').upper().replace('-', '_')
+            if key not in UNPREFIXED:
+                key = f'HTTP_{key}'
+            elif key == 'CONTENT_LENGTH':
+                continue
+            value = value.decode('latin-1')
+            if key in environ:
+                separator = '; ' if key == 'HTTP_COOKIE' else ','
+                value = f'{environ[key]}{separator}{value}'
+            environ[key] = value
+        return environ
+
+    def call(self, environ):
+        """
+        Выполняет запрос в потоке пула. Обычный ответ возвращается
+        целиком и закрывается здесь же: сигнал request_finished
+        закрывает подключения к базе именно этого потока.
+        """
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        response = self.application(environ, start_response)
+        if getattr(response, 'streaming', False):
+            return started['status'], started['headers'], response
+        try:
+            return started['status'], started['headers'], b''.join(response)
+        finally:
+            response.close()
+
+    async def http(self, scope, receive, send):
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            status, headers, content = await loop.run_in_executor(
+                self.executor, self.call, self.environ(scope, body)
+            )
+        finally:
+            body.close()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers,
+        })
+        if isinstance(content, bytes):
+            await send({'type': 'http.response.body', 'body': content})
+            return
+        try:
+            if hasattr(content, 'async_stream'):
+                await self.stream_async(content, receive, send)
+                return
+            chunks = iter(content)
+            while True:
+                chunk = await loop.run_in_executor(
+                    self.executor, next, chunks, None
+                )
+                if chunk is None:
+                    break
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+            await send({'type': 'http.response.body'})
+        finally:
+            await loop.run_in_executor(self.executor, content.close)
+
+    async def stream_async(self, content, receive, send):
+        loop = asyncio.get_running_loop()
+
+        def run(function, *args):
+            return loop.run_in_executor(self.executor, function, *args)
+
+        # поток без конца прерывается, как только клиент отключился
+        disconnected = asyncio.ensure_future(self.disconnect(receive))
+        try:
+            async for chunk in content.async_stream(run):
+                if disconnected.done():
+                    return
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+            await send({'type': 'http.response.body'})
+        finally:
+            disconnected.cancel()
+
+    @staticmethod
+    async def disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
@@ -0,0 +1,222 @@
+"""
+Кеш в файле SQLite, общий для всех процессов одного хоста.
+
+LocMemCache у каждого воркера свой: страницы собираются в каждом
+процессе заново, а блокировки и счётчики не видны соседям. Файл SQLite
+в режиме WAL читается параллельно с записью и не требует отдельного
+сервера. Значения хранятся в pickle, просроченные записи и лишние
+записи сверх MAX_ENTRIES удаляются при случайной доле записей.
+"""
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends import filebased, locmem
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .metrics import timed_cache
+
+# Доля операций записи, после которых чистится таблица
+CULL_PROBABILITY: float = 0.01
+# Сколько ждать блокировку записи другого процесса, секунд
+BUSY_TIMEOUT: float = 5.0
+# Ключей в одном SELECT ... IN: старые сборки SQLite ограничивают
+# число параметров запроса 999
+MANY_CHUNK: int = 500
+
+
+# Стандартные бэкенды с учётом времени обращений в Server-Timing
+LocMemCache = timed_cache(locmem.LocMemCache)
+FileBasedCache = timed_cache(filebased.FileBasedCache)
+
+
+@timed_cache
+class SQLiteCache(BaseCache):
+    """Кеш Django в отдельном файле SQLite (LOCATION — путь к файлу)."""
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.location = location
+        self._local = threading.local()
+
+    @property
+    def _connection(self):
+        # подключение своё у каждого потока и у каждого процесса
+        # после fork: объект sqlite3 нельзя передавать между ними
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self.location)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self.location, timeout=BUSY_TIMEOUT, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL'
+                ') WITHOUT ROWID'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)'
+            )
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _row(self, key, value, timeout):
+        return (
+            key,
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            self.get_backend_timeout(timeout),
+        )
+
+    def get(self, key, default=None, version=None):
+        row = self._connection.execute(
+            'SELECT value FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time()),
+        ).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        """Значения нескольких ключей: SELECT ... IN на MANY_CHUNK ключей."""
+        names = {self._key(key, version): key for key in keys}
+        found = {}
+        now = time.time()
+        chunk = list(names)
+        for start in range(0, len(chunk), MANY_CHUNK):
+            part = chunk[start:start + MANY_CHUNK]
+            rows = self._connection.execute(
+                f'SELECT key, value FROM cache WHERE key IN '
+                f'({", ".join("?" * len(part))}) '
+                f'AND (expires IS NULL OR expires > ?)',
+                (*part, now),
+            )
+            for key, value in rows:
+                found[names[key]] = pickle.loads(value)
+        return found
+
+    def _write_many(self, sql, rows):
+        # одна транзакция: блокировка записи берётся один раз
+        connection = self._connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(sql, rows)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write_many(
+            'INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+            [
+                self._row(self._key(key, version), value, timeout)
+                for key, value in data.items()
+            ],
+        )
+        self._maybe_cull()
+        return []
+
+    def delete_many(self, keys, version=None):
+        self._write_many(
+            'DELETE FROM cache WHERE key = ?',
+            [(self._key(key, version),) for key in keys],
+        )
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._connection.execute(
+            'INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+            self._row(self._key(key, version), value, timeout),
+        )
+        self._maybe_cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # атомарно: запись добавляется, только если ключа нет
+        # или он просрочен, поэтому add годится для блокировок
+        cursor = self._connection.execute(
+            'INSERT INTO cache VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE '
+            'SET value = excluded.value, expires = excluded.expires '
+            'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            self._row(self._key(key, version), value, timeout)
+            + (time.time(),),
+        )
+        self._maybe_cull()
+        return cursor.rowcount == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._connection.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (
+                self.get_backend_timeout(timeout),
+                self._key(key, version),
+                time.time(),
+            ),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        cursor = self._connection.execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),)
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        connection = self._connection
+        key = self._key(key, version)
+        # BEGIN IMMEDIATE сразу берёт блокировку записи:
+        # чтение и запись значения не перемежаются с другими процессами
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key),
+            )
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return value
+
+    def clear(self):
+        self._connection.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # подключения живут всё время работы потока
+        pass
+
+    def _maybe_cull(self):
+        if random.random() < CULL_PROBABILITY:
+            self._cull()
+
+    def _cull(self):
+        connection = self._connection
+        connection.execute(
+            'DELETE FROM cache WHERE expires <= ?', (time.time(),)
+        )
+        total = connection.execute('SELECT count(*) FROM cache').fetchone()[0]
+        if total > self._max_entries:
+            # сначала уходят записи, которые истекут раньше других
+            connection.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT ?)',
+                (total // self._cull_frequency,),
+            )
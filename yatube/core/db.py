@@ -0,0 +1,25 @@
+"""
+Настройка подключений SQLite.
+
+По умолчанию SQLite пишет журнал отката (journal_mode=DELETE): запись
+блокирует всю базу, и читатели главной ждут, пока сохраняется пост.
+В режиме WAL читатели работают параллельно с писателем. Прагмы из
+SQLITE_PRAGMAS выполняются для каждого нового подключения.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def apply_pragmas(cursor, pragmas):
+    """Выполняет прагмы; cursor — курсор Django или sqlite3."""
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
@@ -0,0 +1,128 @@
+"""
+Очередь исходящей почты.
+
+QueuedEmailBackend не связывается с почтовым сервером: письма
+сохраняются в таблицу OutgoingEmail, и запрос (например, сброс пароля)
+не ждёт SMTP. Команда send_queued_mail забирает подошедшие письма
+пачками и отправляет их бэкендом EMAIL_QUEUE_BACKEND через одно
+подключение на пачку. Неудачная попытка откладывает письмо с
+экспоненциальной задержкой, после EMAIL_QUEUE_MAX_ATTEMPTS попыток
+письмо остаётся в таблице в состоянии failed.
+"""
+import logging
+import random
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Бэкенд почты Django, который ставит письма в очередь."""
+    def send_messages(self, email_messages):
+        now = timezone.now()
+        rows = [
+            OutgoingEmail.from_message(message, now)
+            for message in email_messages
+            if message.recipients()
+        ]
+        try:
+            OutgoingEmail.objects.bulk_create(rows)
+        except DatabaseError:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(rows)
+
+
+def backoff(attempts):
+    """Задержка перед следующей попыткой: растёт вдвое, с разбросом."""
+    delay = min(
+        settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.EMAIL_QUEUE_MAX_RETRY_DELAY,
+    )
+    # разброс не даёт письмам, упавшим вместе, вернуться одной пачкой
+    return timedelta(seconds=delay * random.uniform(1, 1.25))
+
+
+def claim(batch_size):
+    """
+    Забирает до batch_size подошедших писем. Пока пачка отправляется,
+    срок письма сдвинут на EMAIL_QUEUE_LEASE: другой воркер его не
+    возьмёт, а письма упавшего воркера вернутся в очередь сами.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.QUEUED, next_attempt__lte=now
+    )
+    # повторная проверка срока в UPDATE: письмо, которое между
+    # выборкой и обновлением взял другой воркер, пропускается
+    due.filter(
+        pk__in=list(due.values_list('pk', flat=True)[:batch_size])
+    ).update(
+        claimed_by=token,
+        next_attempt=now + timedelta(seconds=settings.EMAIL_QUEUE_LEASE),
+    )
+    return list(OutgoingEmail.objects.filter(claimed_by=token))
+
+
+def _failed(row, error):
+    row.attempts += 1
+    row.last_error = str(error)
+    row.claimed_by = ''
+    if row.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+        row.status = OutgoingEmail.FAILED
+        logger.error('Письмо %s не отправлено: %s', row.pk, error)
+    else:
+        row.next_attempt = timezone.now() + backoff(row.attempts)
+    row.save(update_fields=[
+        'attempts', 'last_error', 'claimed_by', 'status', 'next_attempt'
+    ])
+
+
+def deliver(batch_size=None):
+    """Отправляет одну пачку; возвращает число отправленных и неудач."""
+    rows = claim(batch_size or settings.EMAIL_QUEUE_BATCH_SIZE)
+    if not rows:
+        return 0, 0
+    connection = get_connection(settings.EMAIL_QUEUE_BACKEND)
+    sent = []
+    failed = 0
+    try:
+        connection.open()
+    except OSError as error:
+        # сервер недоступен: вся пачка откладывается
+        for row in rows:
+            _failed(row, error)
+        return 0, len(rows)
+    try:
+        for row in rows:
+            try:
+                delivered = connection.send_messages([row.email()])
+            except Exception as error:
+                # кроме ошибок SMTP (подклассы OSError) это битый pickle,
+                # BadHeaderError и ошибки бэкенда: письмо откладывается,
+                # а не роняет воркер вместе с пачкой; после ошибки
+                # подключение переоткрывается для следующего письма
+                _failed(row, error)
+                failed += 1
+                connection.close()
+                continue
+            if delivered:
+                sent.append(row.pk)
+            else:
+                _failed(row, 'бэкенд не принял письмо')
+                failed += 1
+    finally:
+        connection.close()
+        OutgoingEmail.objects.filter(pk__in=sent).delete()
+    return len(sent), failed
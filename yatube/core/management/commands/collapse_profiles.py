@@ -0,0 +1,64 @@
+import os
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.profiling import EXTENSION, categorize, read_stacks, write_stacks
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводит снимки стеков из PROFILING_DIR в один файл collapsed '
+        'stacks на представление (для flamegraph.pl и speedscope) и '
+        'печатает долю SQL, шаблонов, sorl и Pillow'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=os.path.join(settings.PROFILING_DIR, 'out'),
+            help='Каталог для файлов <представление>.collapsed',
+        )
+        parser.add_argument(
+            '--view', action='append',
+            help='Только эти представления, например posts.post_detail',
+        )
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(settings.PROFILING_DIR):
+            self.stdout.write('Профилей пока нет')
+            return
+        os.makedirs(options['output'], exist_ok=True)
+        interval_ms = settings.PROFILING_INTERVAL * 1000
+        for view in sorted(os.listdir(settings.PROFILING_DIR)):
+            directory = os.path.join(settings.PROFILING_DIR, view)
+            if options['view'] and view not in options['view']:
+                continue
+            if not os.path.isdir(directory):
+                continue
+            # каталог с результатами прошлых запусков — не представление
+            if os.path.samefile(directory, options['output']):
+                continue
+            files = [
+                entry.path for entry in os.scandir(directory)
+                if entry.name.endswith(EXTENSION)
+            ]
+            if not files:
+                continue
+            stacks = Counter()
+            for path in files:
+                read_stacks(path, stacks)
+            write_stacks(
+                os.path.join(options['output'], f'{view}{EXTENSION}'), stacks
+            )
+            totals = categorize(stacks)
+            samples = sum(totals.values())
+            shares = ', '.join(
+                f'{name} {count / (samples or 1):.0%}'
+                for name, count in totals.items()
+            )
+            self.stdout.write(
+                f'{view}: запросов {len(files)}, снимков {samples}, '
+                f'~{samples * interval_ms / len(files):.1f} мс на запрос; '
+                f'{shares}'
+            )
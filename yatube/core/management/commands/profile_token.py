@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = (
+        'Печатает значение заголовка X-Yatube-Profile, с которым запрос '
+        'профилируется независимо от PROFILING_RATE'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_token())
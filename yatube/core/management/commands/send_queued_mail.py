@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import mail
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди QueuedEmailBackend пачками; с --loop '
+        'работает постоянно и проверяет очередь раз в --interval секунд'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch', type=int, default=settings.EMAIL_QUEUE_BATCH_SIZE
+        )
+        parser.add_argument('--loop', action='store_true')
+        parser.add_argument(
+            '--interval', type=float,
+            default=settings.EMAIL_QUEUE_POLL_INTERVAL,
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = mail.deliver(options['batch'])
+            if sent or failed:
+                self.stdout.write(f'отправлено {sent}, ошибок {failed}')
+            if not options['loop']:
+                return
+            # полная пачка — в очереди, скорее всего, есть ещё письма
+            if sent + failed < options['batch']:
+                try:
+                    time.sleep(options['interval'])
+                except KeyboardInterrupt:
+                    return
@@ -0,0 +1,127 @@
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db import apply_pragmas
+
+SCHEMA = (
+    'CREATE TABLE post ('
+    'id INTEGER PRIMARY KEY, text TEXT NOT NULL, pub_date REAL NOT NULL)',
+    'CREATE INDEX post_pub_date ON post (pub_date)',
+)
+TEXT = 'Тестовый пост ' * 20
+# Время на запуск процессов до общего старта, секунд
+WARMUP: float = 1.0
+
+
+def _connect(path, pragmas):
+    connection = sqlite3.connect(path, isolation_level=None)
+    apply_pragmas(connection, pragmas)
+    return connection
+
+
+def _seed(path, pragmas, posts):
+    connection = _connect(path, pragmas)
+    for sql in SCHEMA:
+        connection.execute(sql)
+    now = time.time()
+    connection.execute('BEGIN')
+    connection.executemany(
+        'INSERT INTO post (text, pub_date) VALUES (?, ?)',
+        ((TEXT, now - number) for number in range(posts)),
+    )
+    connection.execute('COMMIT')
+    connection.close()
+
+
+def _work(role, path, pragmas, start, stop):
+    """Читает главную или пишет посты до stop; (роль, операций, ошибок)."""
+    connection = _connect(path, pragmas)
+    operations = errors = 0
+    time.sleep(max(start - time.time(), 0))
+    while time.time() < stop:
+        try:
+            if role == 'read':
+                connection.execute(
+                    'SELECT id, text, pub_date FROM post '
+                    'ORDER BY pub_date DESC LIMIT 10'
+                ).fetchall()
+            else:
+                connection.execute(
+                    'INSERT INTO post (text, pub_date) VALUES (?, ?)',
+                    (TEXT, time.time()),
+                )
+            operations += 1
+        except sqlite3.OperationalError:
+            # database is locked: истёк busy_timeout
+            errors += 1
+    connection.close()
+    return role, operations, errors
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite при одновременных '
+        'чтении и записи с настройками по умолчанию и с SQLITE_PRAGMAS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--duration', type=float, default=5.0,
+            help='Длительность каждого прогона, секунд',
+        )
+        parser.add_argument('--posts', type=int, default=10000)
+
+    def run(self, pragmas, options):
+        roles = (
+            ['read'] * options['readers'] + ['write'] * options['writers']
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = f'{directory}/benchmark.sqlite3'
+            _seed(path, pragmas, options['posts'])
+            start = time.time() + WARMUP
+            stop = start + options['duration']
+            with ProcessPoolExecutor(max_workers=len(roles)) as executor:
+                results = list(executor.map(
+                    _work,
+                    roles,
+                    [path] * len(roles),
+                    [pragmas] * len(roles),
+                    [start] * len(roles),
+                    [stop] * len(roles),
+                ))
+        totals = {'read': 0, 'write': 0, 'errors': 0}
+        for role, operations, errors in results:
+            totals[role] += operations
+            totals['errors'] += errors
+        return {
+            'read': totals['read'] / options['duration'],
+            'write': totals['write'] / options['duration'],
+            'errors': totals['errors'],
+        }
+
+    def handle(self, *args, **options):
+        runs = (
+            ('по умолчанию', {}),
+            ('SQLITE_PRAGMAS', settings.SQLITE_PRAGMAS),
+        )
+        results = {}
+        for title, pragmas in runs:
+            results[title] = result = self.run(pragmas, options)
+            self.stdout.write(
+                f'{title}: чтений/с {result["read"]:.0f}, '
+                f'записей/с {result["write"]:.0f}, '
+                f'ошибок блокировки {result["errors"]}'
+            )
+        default, tuned = results.values()
+        for role, name in (('read', 'чтение'), ('write', 'запись')):
+            if default[role]:
+                self.stdout.write(
+                    f'{name}: x{tuned[role] / default[role]:.2f}'
+                )
@@ -0,0 +1,433 @@
+"""
+Метрики запросов: заголовок Server-Timing и агрегаты для Prometheus.
+
+MetricsMiddleware измеряет у каждого запроса время SQL, отрисовки
+шаблонов, обращений к кешу и общее время, отдаёт их в Server-Timing и
+добавляет к счётчикам и гистограмме задержек маршрута. Счётчики
+процесса лежат в его собственном файле в METRICS_DIR, отображённом
+в память: воркеры пишут без блокировок друг друга, а представление
+metrics складывает файлы всех процессов. Вложенные участки не
+вычитаются: SQL, выполненный при отрисовке шаблона, входит и в db,
+и в template.
+"""
+import functools
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.template.backends import django as django_backend
+
+from .queries import request_queries
+
+logger = logging.getLogger(__name__)
+
+EXTENSION = '.metrics'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+# Семейства метрик: тип и описание для # TYPE и # HELP
+FAMILIES = {
+    'yatube_requests_total': (
+        'counter', 'Число ответов по маршрутам, методам и статусам'
+    ),
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время ответа маршрута, секунд'
+    ),
+    'yatube_request_phase_seconds_total': (
+        'counter', 'Суммарное время SQL, шаблонов и кеша, секунд'
+    ),
+    'yatube_request_queries_total': (
+        'counter', 'Число SQL-запросов маршрута'
+    ),
+    'yatube_listing_cache_total': (
+        'counter', 'Попадания и промахи кеша страниц со списками постов'
+    ),
+}
+HISTOGRAM_SUFFIXES = ('_bucket', '_sum', '_count')
+PHASES = ('db', 'template', 'cache')
+
+# Файл счётчиков: длина занятой части, затем записи
+# «длина ключа, ключ, выравнивание до 8 байт, значение double»
+USED = struct.Struct('<Q')
+LENGTH = struct.Struct('<I')
+VALUE = struct.Struct('<d')
+INITIAL_SIZE = 64 * 1024
+
+_timings = ContextVar('metrics_timings', default=None)
+
+
+class Timings:
+    """Время участков текущего запроса."""
+    def __init__(self):
+        self.durations = Counter()
+        self.active = set()
+
+
+@contextmanager
+def timing(name):
+    """
+    Добавляет время блока к участку name текущего запроса. Вложенный
+    блок того же участка (get_many через get) не считается дважды.
+    """
+    timings = _timings.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+    timings.active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[name] += time.perf_counter() - start
+        timings.active.discard(name)
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        with timing('template'):
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Шаблонизатор Django, который учитывает время отрисовки."""
+    def from_string(self, template_code):
+        return Template(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
+
+
+CACHE_METHODS = (
+    'add', 'get', 'set', 'touch', 'delete', 'get_many', 'has_key', 'incr',
+    'decr', 'set_many', 'delete_many', 'clear', 'get_or_set',
+)
+
+
+def _timed_cache_method(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with timing('cache'):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def timed_cache(backend):
+    """Подкласс бэкенда кеша, который учитывает время обращений."""
+    namespace = {
+        name: _timed_cache_method(getattr(backend, name))
+        for name in CACHE_METHODS
+    }
+    namespace['__module__'] = backend.__module__
+    namespace['__doc__'] = backend.__doc__
+    return type(backend.__name__, (backend,), namespace)
+
+
+def _padded(size):
+    return (size + VALUE.size - 1) // VALUE.size * VALUE.size
+
+
+def read_entries(data):
+    """Ключи, смещения и значения записей файла счётчиков."""
+    used, = USED.unpack_from(data)
+    offset = USED.size
+    while offset < used:
+        length, = LENGTH.unpack_from(data, offset)
+        start = offset + LENGTH.size
+        key = bytes(data[start:start + length]).decode()
+        value_offset = offset + _padded(LENGTH.size + length)
+        value, = VALUE.unpack_from(data, value_offset)
+        yield key, value_offset, value
+        offset = value_offset + VALUE.size
+
+
+class Store:
+    """
+    Счётчики одного процесса в файле, отображённом в память.
+
+    Пишет только процесс-владелец; читатели из других процессов видят
+    запись целиком, потому что длина занятой части обновляется после
+    неё.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = max(os.fstat(self._fd).st_size, INITIAL_SIZE)
+        os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        # файл мог остаться от завершённого процесса с тем же pid
+        self._offsets = {
+            key: offset for key, offset, value in read_entries(self._map)
+        }
+        self._used = max(USED.unpack_from(self._map)[0], USED.size)
+
+    def add(self, key, amount):
+        with self._lock:
+            offset = self._offsets.get(key)
+            if offset is None:
+                offset = self._append(key)
+            value, = VALUE.unpack_from(self._map, offset)
+            VALUE.pack_into(self._map, offset, value + amount)
+
+    def _append(self, key):
+        encoded = key.encode()
+        offset = self._used + _padded(LENGTH.size + len(encoded))
+        end = offset + VALUE.size
+        if end > len(self._map):
+            self._grow(end)
+        LENGTH.pack_into(self._map, self._used, len(encoded))
+        start = self._used + LENGTH.size
+        self._map[start:start + len(encoded)] = encoded
+        VALUE.pack_into(self._map, offset, 0.0)
+        self._used = end
+        USED.pack_into(self._map, 0, end)
+        self._offsets[key] = offset
+        return offset
+
+    def _grow(self, needed):
+        size = len(self._map)
+        while size < needed:
+            size *= 2
+        self._map.close()
+        os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _absorb_dead(directory, store):
+    """
+    Переносит счётчики завершившихся процессов в store, чтобы каталог
+    не рос, а суммы не уменьшались. Файл сначала переименовывается:
+    из нескольких новых воркеров его заберёт только один.
+    """
+    for entry in os.scandir(directory):
+        pid = entry.name[:-len(EXTENSION)]
+        if (
+            not entry.name.endswith(EXTENSION) or not pid.isdigit()
+            or int(pid) == store.pid or _alive(int(pid))
+        ):
+            continue
+        claimed = f'{entry.path}.{store.pid}'
+        try:
+            os.rename(entry.path, claimed)
+        except FileNotFoundError:
+            continue
+        with open(claimed, 'rb') as file:
+            data = file.read()
+        for key, offset, value in read_entries(data):
+            store.add(key, value)
+        os.remove(claimed)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Счётчики текущего процесса; None, если сбор отключён."""
+    global _store
+    directory = settings.METRICS_DIR
+    if directory is None:
+        return None
+    with _store_lock:
+        store = _store
+        # после fork воркер заводит свой файл
+        if (
+            store is None or store.pid != os.getpid()
+            or os.path.dirname(store.path) != directory
+        ):
+            os.makedirs(directory, exist_ok=True)
+            store = Store(
+                os.path.join(directory, f'{os.getpid()}{EXTENSION}')
+            )
+            _absorb_dead(directory, store)
+            if _store is not None and _store.pid == store.pid:
+                _store.close()
+            _store = store
+    return store
+
+
+def _key(name, **labels):
+    return json.dumps([name, labels], sort_keys=True)
+
+
+def increment(name, amount=1, **labels):
+    """Добавляет amount к счётчику name текущего процесса."""
+    store = get_store()
+    if store is not None:
+        store.add(_key(name, **labels), amount)
+
+
+def observe(route, method, status, durations, queries):
+    """Добавляет запрос к счётчикам и гистограмме маршрута."""
+    store = get_store()
+    if store is None:
+        return
+    method = method if method in METHODS else 'other'
+    store.add(
+        _key(
+            'yatube_requests_total',
+            route=route, method=method, status=str(status)
+        ),
+        1,
+    )
+    total = durations['total']
+    # пустые корзины тоже записываются: Prometheus ждёт все границы
+    for bound in settings.METRICS_BUCKETS:
+        store.add(
+            _key(
+                'yatube_request_duration_seconds_bucket',
+                route=route, le=repr(float(bound))
+            ),
+            total <= bound,
+        )
+    store.add(
+        _key('yatube_request_duration_seconds_bucket', route=route, le='+Inf'),
+        1,
+    )
+    store.add(_key('yatube_request_duration_seconds_sum', route=route), total)
+    store.add(_key('yatube_request_duration_seconds_count', route=route), 1)
+    for phase in PHASES:
+        store.add(
+            _key(
+                'yatube_request_phase_seconds_total', route=route, phase=phase
+            ),
+            durations[phase],
+        )
+    store.add(_key('yatube_request_queries_total', route=route), queries)
+
+
+def collect(directory):
+    """Сумма счётчиков всех процессов, записавших файлы в directory."""
+    totals = Counter()
+    if directory is None or not os.path.isdir(directory):
+        return totals
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(EXTENSION):
+            continue
+        try:
+            with open(entry.path, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            # файл забрал новый процесс после завершения владельца
+            continue
+        for key, offset, value in read_entries(data):
+            totals[key] += value
+    return totals
+
+
+def total(name, **labels):
+    """Сумма счётчика name по всем процессам."""
+    return collect(settings.METRICS_DIR)[_key(name, **labels)]
+
+
+def _family(name):
+    for suffix in HISTOGRAM_SUFFIXES:
+        base = name[:-len(suffix)]
+        if name.endswith(suffix) and base in FAMILIES:
+            return base
+    return name
+
+
+def _number(value):
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _escape(value):
+    return (
+        value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    )
+
+
+def render(totals):
+    """Счётчики в текстовом формате Prometheus."""
+    families = defaultdict(list)
+    for key, value in totals.items():
+        name, labels = json.loads(key)
+        family = _family(name)
+        suffix = name[len(family):]
+        bound = labels.pop('le', None)
+        # корзины гистограммы идут по возрастанию границы, за ними
+        # сумма и число наблюдений
+        order = (
+            sorted(labels.items()),
+            HISTOGRAM_SUFFIXES.index(suffix) if suffix else 0,
+            float(bound) if bound else 0,
+        )
+        if bound:
+            labels['le'] = bound
+        families[family].append((order, name, labels, value))
+    lines = []
+    for family, (kind, description) in FAMILIES.items():
+        lines.append(f'# HELP {family} {description}')
+        lines.append(f'# TYPE {family} {kind}')
+        for order, name, labels, value in sorted(families[family]):
+            rendered = ','.join(
+                f'{label}="{_escape(text)}"' for label, text in labels.items()
+            )
+            lines.append(f'{name}{{{rendered}}} {_number(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def server_timing(durations):
+    return ', '.join(
+        f'{name};dur={duration * 1000:.1f}'
+        for name, duration in durations.items()
+    )
+
+
+class MetricsMiddleware:
+    """Server-Timing для каждого ответа и агрегаты по маршрутам."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = Timings()
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with request_queries(request) as recorder:
+                response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+        durations = {
+            'db': recorder.total_time,
+            'template': timings.durations['template'],
+            'cache': timings.durations['cache'],
+            'total': time.perf_counter() - start,
+        }
+        response['Server-Timing'] = server_timing(durations)
+        match = getattr(request, 'resolver_match', None)
+        try:
+            observe(
+                match.view_name if match else 'unresolved',
+                request.method,
+                response.status_code,
+                durations,
+                recorder.count,
+            )
+        except OSError:
+            logger.exception('Не удалось записать метрики запроса')
+        return response
@@ -0,0 +1,83 @@
+import pickle
+
+from django.db import models
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку, см. core.mail."""
+    QUEUED = 'queued'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    message = models.BinaryField(
+        verbose_name='Письмо',
+        help_text='EmailMessage в pickle без подключения'
+    )
+    subject = models.CharField(
+        max_length=255,
+        verbose_name='Тема',
+    )
+    recipients = models.TextField(
+        verbose_name='Получатели',
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+        verbose_name='Состояние',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата постановки в очередь',
+    )
+    next_attempt = models.DateTimeField(
+        verbose_name='Следующая попытка',
+        help_text='Пока воркер отправляет письмо, здесь конец его аренды'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Неудачных попыток',
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка',
+    )
+    claimed_by = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name='Воркер',
+        help_text='Метка пачки воркера, который взял письмо'
+    )
+
+    class Meta:
+        ordering = ['next_attempt']
+        # воркер выбирает письма, срок которых подошёл
+        indexes = [
+            models.Index(
+                name='email_status_next_attempt_idx',
+                fields=['status', 'next_attempt'],
+            ),
+        ]
+
+    @classmethod
+    def from_message(cls, message, when):
+        connection, message.connection = message.connection, None
+        try:
+            data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+        finally:
+            message.connection = connection
+        return cls(
+            message=data,
+            subject=message.subject[:255],
+            recipients=', '.join(message.recipients()),
+            next_attempt=when,
+        )
+
+    def email(self):
+        return pickle.loads(self.message)
+
+    def __str__(self):
+        return f'{self.subject} → {self.recipients}'
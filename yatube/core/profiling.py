@@ -0,0 +1,187 @@
+"""
+Выборочное профилирование запросов в рабочем окружении.
+
+Доля PROFILING_RATE запросов, а также запросы с подписанным заголовком
+X-Yatube-Profile, выполняются под сэмплером стека: отдельный поток раз
+в PROFILING_INTERVAL секунд снимает стек потока запроса. Снимки
+сохраняются в PROFILING_DIR/<имя представления>/ в формате collapsed
+stacks и сводятся командой collapse_profiles для flamegraph.pl или
+speedscope. Остальные запросы платят только за сравнение со случайным
+числом.
+"""
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'HTTP_X_YATUBE_PROFILE'
+RESPONSE_HEADER = 'X-Yatube-Profile-Id'
+SALT = 'core.profiling'
+EXTENSION = '.collapsed'
+
+# Категории для сводки: снимок относится к ближайшей к вершине стека
+# подходящей категории, поэтому SQL и sorl внутри тегов шаблона не
+# считаются временем шаблонов
+CATEGORIES = (
+    ('sql', f'django{os.sep}db{os.sep}'),
+    ('templates', f'django{os.sep}template{os.sep}'),
+    ('sorl', f'sorl{os.sep}'),
+    ('pillow', f'PIL{os.sep}'),
+)
+
+
+def make_token():
+    """Значение заголовка, включающего профилирование запроса."""
+    return signing.TimestampSigner(salt=SALT).sign('profile')
+
+
+def valid_token(token):
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def _handle(get_response, request):
+    # корень всех стеков: кадры сервера выше него не сохраняются
+    return get_response(request)
+
+
+def frame_name(code):
+    return f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    """Снимает стек текущего потока, пока открыт контекст."""
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name='profiling-sampler', daemon=True
+        )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = self._stack(frame)
+            if stack:
+                self.stacks[stack] += 1
+
+    @staticmethod
+    def _stack(frame):
+        names = []
+        while frame is not None:
+            names.append(frame_name(frame.f_code).replace(';', ':'))
+            if frame.f_code is _handle.__code__:
+                return ';'.join(reversed(names))
+            frame = frame.f_back
+        # запрос ещё не дошёл до _handle или уже вышел из него
+        return None
+
+
+def view_directory(request):
+    match = getattr(request, 'resolver_match', None)
+    name = match.view_name if match else 'unresolved'
+    return os.path.join(settings.PROFILING_DIR, name.replace(':', '.'))
+
+
+def _trim(directory, keep):
+    """Оставляет в каталоге не больше keep самых свежих профилей."""
+    entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+    for entry in entries[:max(len(entries) - keep, 0)]:
+        os.remove(entry.path)
+
+
+def write_stacks(path, stacks):
+    with open(path, 'w') as file:
+        for stack, count in sorted(stacks.items()):
+            file.write(f'{stack} {count}\n')
+
+
+def read_stacks(path, stacks=None):
+    stacks = Counter() if stacks is None else stacks
+    with open(path) as file:
+        for line in file:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                stacks[stack] += int(count)
+    return stacks
+
+
+def save(request, stacks):
+    directory = view_directory(request)
+    os.makedirs(directory, exist_ok=True)
+    # имя начинается со времени: по нему же отбираются старые профили
+    name = f'{time.time():.6f}-{uuid.uuid4().hex[:8]}'
+    write_stacks(os.path.join(directory, f'{name}{EXTENSION}'), stacks)
+    _trim(directory, settings.PROFILING_MAX_FILES)
+    return name
+
+
+def categorize(stacks):
+    """Число снимков по категориям CATEGORIES и прочим."""
+    totals = dict.fromkeys(
+        [name for name, _ in CATEGORIES] + ['other'], 0
+    )
+    for stack, count in stacks.items():
+        for frame in reversed(stack.split(';')):
+            category = next(
+                (name for name, marker in CATEGORIES if marker in frame),
+                None
+            )
+            if category:
+                totals[category] += count
+                break
+        else:
+            totals['other'] += count
+    return totals
+
+
+class ProfilingMiddleware:
+    """Снимает стеки выбранных запросов вместе с нижележащими middleware."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def sampled(self, request):
+        token = request.META.get(HEADER)
+        if token is not None:
+            return valid_token(token), True
+        rate = settings.PROFILING_RATE
+        return rate > 0 and random.random() < rate, False
+
+    def __call__(self, request):
+        sampled, requested = self.sampled(request)
+        if not sampled:
+            return self.get_response(request)
+        with StackSampler(settings.PROFILING_INTERVAL) as sampler:
+            response = _handle(self.get_response, request)
+        try:
+            name = save(request, sampler.stacks)
+        except OSError:
+            logger.exception('Не удалось сохранить профиль запроса')
+            return response
+        if requested:
+            response[RESPONSE_HEADER] = name
+        return response
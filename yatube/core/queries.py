@@ -0,0 +1,98 @@
+"""Учёт SQL-запросов запроса и бюджеты запросов для представлений."""
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def query_budget(max_queries):
+    """Объявляет максимальное число SQL-запросов представления."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+class QueryRecorder:
+    """Записывает SQL и время выполнения запросов во всех подключениях."""
+    def __init__(self):
+        self.queries = []
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(duration for sql, duration in self.queries)
+
+    @property
+    def duplicates(self):
+        """Одинаковые запросы, выполненные несколько раз."""
+        counter = Counter(sql for sql, duration in self.queries)
+        return {sql: times for sql, times in counter.items() if times > 1}
+
+
+@contextmanager
+def request_queries(request):
+    """
+    QueryRecorder запроса. Первый middleware включает запись и кладёт
+    его в request.query_recorder, остальные пишут в тот же: каждый SQL
+    сохраняется один раз, сколько бы middleware его ни учитывали.
+    """
+    recorder = getattr(request, 'query_recorder', None)
+    if recorder is not None:
+        yield recorder
+        return
+    with QueryRecorder() as recorder:
+        request.query_recorder = recorder
+        yield recorder
+
+
+class QueryBudgetMiddleware:
+    """
+    Считает запросы каждого ответа и пишет предупреждение в лог,
+    если представление превысило бюджет из @query_budget.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.query_budget = None
+        with request_queries(request) as recorder:
+            response = self.get_response(request)
+        budget = request.query_budget
+        if budget is not None and recorder.count > budget:
+            logger.warning(
+                '%s: %d SQL-запросов при бюджете %d (%.1f мс, повторов %d)',
+                request.path,
+                recorder.count,
+                budget,
+                recorder.total_time * 1000,
+                len(recorder.duplicates),
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = getattr(view_func, 'query_budget', None)
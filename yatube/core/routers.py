@@ -0,0 +1,94 @@
+"""
+Чтение с реплик для представлений, которые только читают.
+
+Представление, помеченное @replica_safe, читает с одной из реплик из
+DATABASE_REPLICAS; запись всегда идёт в default. После запроса,
+изменившего данные, клиент получает куку, и до её истечения все его
+чтения идут в default: пользователь видит собственные изменения, даже
+если реплика отстаёт. Сессии и пользователи всегда читаются из default:
+только что созданной сессии на реплике может ещё не быть.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Кука «читать с основной базы» после записи
+STICKY_COOKIE = 'yatube_primary'
+# Приложения, которые читаются только из default
+PRIMARY_APPS = frozenset({'auth', 'sessions'})
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_safe(view):
+    """Помечает представление, которое можно обслуживать с реплики."""
+    view.replica_safe = True
+    return view
+
+
+@contextmanager
+def _reading_from(replica):
+    token = _use_replica.set(replica)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def use_replica():
+    return _reading_from(True)
+
+
+def use_primary():
+    """Чтение из default и внутри @replica_safe."""
+    return _reading_from(False)
+
+
+class ReplicaRouter:
+    """Чтение внутри use_replica() идёт на реплику, запись — в default."""
+    def db_for_read(self, model, **hints):
+        if (_use_replica.get() and settings.DATABASE_REPLICAS
+                and model._meta.app_label not in PRIMARY_APPS):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплики содержат те же данные, что и default
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # схема реплик приходит вместе с данными из default
+        return db == 'default'
+
+
+class ReplicaMiddleware:
+    """Чтение с реплики для @replica_safe и кука после записи."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._replica_token = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if request._replica_token is not None:
+                _use_replica.reset(request._replica_token)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            response.set_cookie(
+                STICKY_COOKIE,
+                '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (getattr(view_func, 'replica_safe', False)
+                and STICKY_COOKIE not in request.COOKIES):
+            request._replica_token = _use_replica.set(True)
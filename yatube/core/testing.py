@@ -0,0 +1,35 @@
+"""
+Настройки, которые тесты меняют у рабочей конфигурации.
+
+manage.py test применяет их через TestRunner (settings.TEST_RUNNER),
+pytest — через фикстуру в conftest.py корня репозитория.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_SETTINGS = {
+    # фоновые потоки пережили бы временный MEDIA_ROOT теста
+    'THUMBNAIL_WORKERS': 0,
+    # счётчики тестовых запросов не пишутся в рабочий каталог метрик
+    'METRICS_DIR': None,
+    # свой кеш у каждого запуска: страницы не переживают тестовую базу
+    'CACHES': {
+        'default': {'BACKEND': 'core.cache.LocMemCache'},
+    },
+}
+
+
+def test_settings():
+    return override_settings(**TEST_SETTINGS)
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner, который запускает тесты с TEST_SETTINGS."""
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._test_settings = test_settings()
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        super().teardown_test_environment(**kwargs)
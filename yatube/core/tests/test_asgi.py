@@ -0,0 +1,102 @@
+import asyncio
+import re
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..asgi import WsgiBridge
+
+
+def call(application, method, path, body=b'', headers=(), chunk=None):
+    """Выполняет запрос через ASGI-приложение; тело можно дробить."""
+    parts = [body[i:i + chunk] for i in range(0, len(body), chunk)] if (
+        chunk and body
+    ) else [body]
+    messages = []
+
+    async def receive():
+        part = parts.pop(0)
+        return {'type': 'http.request', 'body': part, 'more_body': bool(parts)}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path.partition('?')[0],
+        'query_string': path.partition('?')[2].encode(),
+        'headers': [(b'host', b'localhost'), *headers],
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 5000),
+    }
+    asyncio.run(application(scope, receive, send))
+    start, *bodies = messages
+    return (
+        start['status'],
+        dict(start['headers']),
+        b''.join(message.get('body', b'') for message in bodies),
+    )
+
+
+class WsgiBridgeTest(TransactionTestCase):
+    """TestCase для ASGI-моста к обработчику Django"""
+    def setUp(self):
+        cache.clear()
+        self.application = WsgiBridge(threads=2)
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Пост ASGI')
+
+    def tearDown(self):
+        self.application.executor.shutdown()
+
+    def test_get(self):
+        """GET с параметрами доходит до представления"""
+        status, headers, body = call(
+            self.application, 'GET', f'{reverse("posts:search")}?q=ASGI'
+        )
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertIn(b'text/html', headers[b'content-type'])
+        self.assertIn(b'server-timing', headers)
+        self.assertIn('Пост <mark>ASGI</mark>', body.decode())
+
+    def test_post_body_in_chunks(self):
+        """Тело POST, пришедшее частями, читается целиком"""
+        url = reverse('users:login')
+        status, headers, body = call(self.application, 'GET', url)
+        token = re.search(
+            rb'csrftoken=([^;]+)', headers[b'set-cookie']
+        ).group(1)
+        form = b'username=author&password=wrong&csrfmiddlewaretoken=' + token
+        status, headers, body = call(
+            self.application, 'POST', url, body=form, chunk=7, headers=[
+                (b'cookie', b'csrftoken=' + token),
+                (b'content-type', b'application/x-www-form-urlencoded'),
+            ],
+        )
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertIn('alert-danger', body.decode())
+        self.assertIn('value="author"', body.decode())
+
+    def test_lifespan(self):
+        """Сервер получает подтверждение запуска и остановки"""
+        messages = [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(self.application({'type': 'lifespan'}, receive, send))
+        self.assertEqual(
+            sent,
+            ['lifespan.startup.complete', 'lifespan.shutdown.complete'],
+        )
@@ -0,0 +1,84 @@
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ..cache import SQLiteCache
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    """TestCase для кеша в файле SQLite"""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = f'{self.directory}/cache.sqlite3'
+        self.cache = SQLiteCache(self.location, {})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_shared_between_instances(self):
+        """Значения видны другому экземпляру с тем же файлом"""
+        self.cache.set('key', {'value': 1})
+        other = SQLiteCache(self.location, {})
+        self.assertEqual(other.get('key'), {'value': 1})
+        other.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_add_and_expiry(self):
+        """add не перезаписывает живой ключ, но занимает просроченный"""
+        self.assertTrue(self.cache.add('lock', 1, 60))
+        self.assertFalse(self.cache.add('lock', 2, 60))
+        self.cache.set('old', 1, 1)
+        with mock.patch('core.cache.time.time', return_value=time.time() + 5):
+            self.assertIsNone(self.cache.get('old'))
+            self.assertTrue(self.cache.add('old', 2, 60))
+        self.assertEqual(self.cache.get('lock'), 1)
+
+    def test_incr(self):
+        """incr атомарно увеличивает значение"""
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        self.assertEqual(self.cache.get('counter'), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_touch_and_clear(self):
+        """touch продлевает ключ, clear очищает кеш"""
+        self.cache.set('key', 1, 1)
+        self.assertTrue(self.cache.touch('key', None))
+        with mock.patch('core.cache.time.time', return_value=time.time() + 5):
+            self.assertEqual(self.cache.get('key'), 1)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_cull(self):
+        """Лишние записи удаляются сверх MAX_ENTRIES"""
+        cache = SQLiteCache(
+            self.location, {'OPTIONS': {'MAX_ENTRIES': 10}}
+        )
+        cache.set_many({f'key{number}': number for number in range(20)})
+        cache._cull()
+        total = cache._connection.execute(
+            'SELECT count(*) FROM cache'
+        ).fetchone()[0]
+        self.assertLess(total, 20)
+
+    def test_get_many_and_set_many(self):
+        """get_many и set_many обходятся одним запросом на пачку ключей"""
+        data = {f'key{number}': number for number in range(1200)}
+        with mock.patch.object(
+            SQLiteCache, 'set', side_effect=AssertionError
+        ), mock.patch.object(SQLiteCache, 'get', side_effect=AssertionError):
+            self.assertEqual(self.cache.set_many(data), [])
+            self.assertEqual(
+                self.cache.get_many([*data, 'missing']), data
+            )
+        self.cache.set_many({'old': 1}, 1)
+        with mock.patch('core.cache.time.time', return_value=time.time() + 5):
+            self.assertEqual(self.cache.get_many(['old', 'key1']), {'key1': 1})
+        self.cache.delete_many(['key1', 'key2'])
+        self.assertEqual(
+            self.cache.get_many(['key1', 'key2', 'key3']), {'key3': 3}
+        )
@@ -0,0 +1,29 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+
+class SQLitePragmasTest(TestCase):
+    """TestCase для настройки подключений SQLite"""
+    def test_pragmas_applied(self):
+        """Новое подключение получает прагмы из SQLITE_PRAGMAS"""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            # NORMAL
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    @override_settings(SQLITE_PRAGMAS={'journal_mode': 'WAL'})
+    def test_benchmark_command(self):
+        """Бенчмарк сравнивает два прогона"""
+        out = StringIO()
+        call_command(
+            'sqlite_benchmark',
+            readers=1, writers=1, duration=0.2, posts=100,
+            stdout=out,
+        )
+        self.assertIn('по умолчанию', out.getvalue())
+        self.assertIn('SQLITE_PRAGMAS', out.getvalue())
@@ -0,0 +1,129 @@
+import smtplib
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import User
+
+from ..mail import claim, deliver
+from ..models import OutgoingEmail
+
+BROKEN = 'broken@example.com'
+
+
+class CountingBackend(locmem.EmailBackend):
+    """locmem, который считает подключения и отвергает адрес BROKEN."""
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if BROKEN in message.recipients():
+                raise smtplib.SMTPRecipientsRefused({BROKEN: (550, b'no')})
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    EMAIL_QUEUE_BACKEND='core.tests.test_mail.CountingBackend',
+    EMAIL_QUEUE_RETRY_DELAY=60,
+    EMAIL_QUEUE_MAX_RETRY_DELAY=600,
+    EMAIL_QUEUE_MAX_ATTEMPTS=3,
+)
+class QueuedEmailTest(TestCase):
+    """TestCase для очереди исходящей почты"""
+    def setUp(self):
+        CountingBackend.opened = 0
+
+    def queue(self, *recipients):
+        for recipient in recipients:
+            mail.send_mail(
+                'Тема', 'Текст', 'yatube@example.com', [recipient]
+            )
+
+    def test_password_reset_is_queued(self):
+        """Сброс пароля не отправляет письмо в запросе, а ставит в очередь"""
+        User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass'
+        )
+        self.client.post(
+            reverse('users:password_reset'), {'email': 'reader@example.com'}
+        )
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+        self.assertEqual(deliver(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_batch_reuses_connection(self):
+        """Пачка писем уходит через одно подключение"""
+        self.queue(*(f'user{number}@example.com' for number in range(5)))
+        self.assertEqual(deliver(batch_size=3), (3, 0))
+        self.assertEqual(deliver(batch_size=3), (2, 0))
+        self.assertEqual(CountingBackend.opened, 2)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_retry_with_backoff(self):
+        """Неудачное письмо откладывается, остальные отправляются"""
+        self.queue(BROKEN, 'reader@example.com')
+        before = timezone.now()
+        self.assertEqual(deliver(), (1, 1))
+        row = OutgoingEmail.objects.get()
+        self.assertEqual(row.attempts, 1)
+        self.assertIn('550', row.last_error)
+        self.assertGreaterEqual(
+            row.next_attempt, before + timedelta(seconds=60)
+        )
+        self.assertLessEqual(
+            row.next_attempt, timezone.now() + timedelta(seconds=75)
+        )
+        self.assertEqual(deliver(), (0, 0), 'Срок повтора ещё не подошёл')
+
+    def test_gives_up_after_max_attempts(self):
+        """После последней попытки письмо помечается неотправленным"""
+        self.queue(BROKEN)
+        for attempt in range(3):
+            OutgoingEmail.objects.update(next_attempt=timezone.now())
+            self.assertEqual(deliver(), (0, 1))
+        row = OutgoingEmail.objects.get()
+        self.assertEqual(row.status, OutgoingEmail.FAILED)
+        OutgoingEmail.objects.update(next_attempt=timezone.now())
+        self.assertEqual(deliver(), (0, 0))
+
+    def test_claimed_rows_are_leased(self):
+        """Письма, взятые одним воркером, не достаются другому"""
+        self.queue('a@example.com', 'b@example.com')
+        first = claim(1)
+        second = claim(5)
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(second), 1)
+        self.assertNotEqual(first[0].pk, second[0].pk)
+        self.assertEqual(claim(5), [])
+
+    def test_command(self):
+        """Команда отправляет очередь и печатает итог"""
+        self.queue('a@example.com', 'b@example.com')
+        out = StringIO()
+        call_command('send_queued_mail', stdout=out)
+        self.assertIn('отправлено 2, ошибок 0', out.getvalue())
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_broken_message_does_not_stop_batch(self):
+        """Нераспаковываемое письмо откладывается, пачка отправляется"""
+        self.queue('a@example.com', 'b@example.com')
+        broken = OutgoingEmail.objects.first()
+        OutgoingEmail.objects.filter(pk=broken.pk).update(message=b'junk')
+        self.assertEqual(deliver(), (1, 1))
+        row = OutgoingEmail.objects.get()
+        self.assertEqual(row.pk, broken.pk)
+        self.assertEqual(row.attempts, 1)
+        self.assertEqual(row.claimed_by, '')
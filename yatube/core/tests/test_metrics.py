@@ -0,0 +1,193 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .. import metrics
+
+TEMP_METRICS_DIR = tempfile.mkdtemp()
+
+
+def observe_in_child():
+    metrics.observe(
+        'posts:index', 'GET', 200,
+        {'db': 0.01, 'template': 0.02, 'cache': 0, 'total': 0.04}, 3,
+    )
+
+
+TOKEN = 'prometheus-token'
+
+
+@override_settings(METRICS_DIR=TEMP_METRICS_DIR, METRICS_TOKEN=TOKEN)
+class MetricsTest(TestCase):
+    """TestCase для Server-Timing и счётчиков запросов"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = Post.objects.create(
+            author=User.objects.create_user(username='author'),
+            text='Пост для метрик',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+        metrics._store = None
+
+    def totals(self):
+        return metrics.render(metrics.collect(TEMP_METRICS_DIR))
+
+    def test_server_timing(self):
+        """Ответ содержит время SQL, шаблонов, кеша и общее"""
+        response = self.client.get(reverse('posts:index'))
+        phases = dict(
+            part.strip().split(';dur=')
+            for part in response['Server-Timing'].split(',')
+        )
+        self.assertEqual(
+            set(phases), {'db', 'template', 'cache', 'total'}
+        )
+        for phase in ('db', 'template', 'cache'):
+            self.assertGreater(float(phases[phase]), 0, phase)
+            self.assertLessEqual(
+                float(phases[phase]), float(phases['total']), phase
+            )
+
+    def test_route_counters(self):
+        """Запросы попадают в счётчики и гистограмму маршрута"""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        self.client.get('/missing/')
+        output = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION=f'Bearer {TOKEN}'
+        ).content.decode()
+        self.assertIn(
+            'yatube_requests_total{method="GET",route="posts:index",'
+            'status="200"} 2',
+            output,
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket{route="posts:index",'
+            'le="+Inf"} 2',
+            output,
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_count{route="posts:index"} 2',
+            output,
+        )
+        self.assertIn(
+            'yatube_requests_total{method="GET",route="unresolved",'
+            'status="404"} 1',
+            output,
+        )
+
+    def test_access(self):
+        """Метрики доступны по токену и персоналу, но не по адресу"""
+        url = reverse('metrics')
+        self.assertEqual(
+            self.client.get(url, REMOTE_ADDR='127.0.0.1').status_code, 404
+        )
+        self.assertEqual(
+            self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong')
+            .status_code,
+            404,
+        )
+        self.assertEqual(
+            self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {TOKEN}')
+            .status_code,
+            200,
+        )
+        self.client.force_login(
+            User.objects.create_user(username='admin', is_staff=True)
+        )
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with override_settings(METRICS_TOKEN=''):
+            self.client.logout()
+            self.assertEqual(
+                self.client.get(url, HTTP_AUTHORIZATION='Bearer ')
+                .status_code,
+                404,
+            )
+
+    def test_workers_share_counters(self):
+        """Счётчики воркеров складываются, файл завершённого забирается"""
+        observe_in_child()
+        child = multiprocessing.get_context('fork').Process(
+            target=observe_in_child
+        )
+        child.start()
+        child.join()
+        self.assertEqual(len(os.listdir(TEMP_METRICS_DIR)), 2)
+        key = metrics._key(
+            'yatube_request_queries_total', route='posts:index'
+        )
+        self.assertEqual(metrics.collect(TEMP_METRICS_DIR)[key], 6)
+        metrics._store = None
+        metrics.get_store()
+        self.assertEqual(
+            os.listdir(TEMP_METRICS_DIR), [f'{os.getpid()}{metrics.EXTENSION}']
+        )
+        self.assertEqual(metrics.collect(TEMP_METRICS_DIR)[key], 6)
+
+
+class StoreTest(SimpleTestCase):
+    """TestCase для файла счётчиков процесса"""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, f'1{metrics.EXTENSION}')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_grows_and_reopens(self):
+        """Файл растёт под новые ключи и читается после переоткрытия"""
+        store = metrics.Store(self.path)
+        for number in range(5000):
+            store.add(f'key-{number}', number)
+        store.add('key-0', 0.5)
+        store.close()
+        self.assertGreater(os.path.getsize(self.path), metrics.INITIAL_SIZE)
+        store = metrics.Store(self.path)
+        store.add('key-4999', 1)
+        store.close()
+        totals = metrics.collect(self.directory)
+        self.assertEqual(len(totals), 5000)
+        self.assertEqual(totals['key-0'], 0.5)
+        self.assertEqual(totals['key-4999'], 5000)
+
+    def test_render_orders_buckets(self):
+        """Корзины гистограммы идут по возрастанию границы"""
+        with override_settings(METRICS_DIR=self.directory):
+            metrics._store = None
+            metrics.observe(
+                'about:author', 'GET', 200,
+                {'db': 0, 'template': 0.001, 'cache': 0, 'total': 0.3}, 0,
+            )
+            metrics._store = None
+        lines = [
+            line for line in metrics.render(
+                metrics.collect(self.directory)
+            ).splitlines()
+            if line.startswith('yatube_request_duration_seconds')
+        ]
+        bounds = [line.split('le="')[1].split('"')[0] for line in lines[:-2]]
+        self.assertEqual(bounds[-1], '+Inf')
+        self.assertEqual(
+            [float(bound) for bound in bounds],
+            sorted(float(bound) for bound in bounds),
+        )
+        self.assertIn('le="0.25"} 0', lines[5])
+        self.assertIn('le="0.5"} 1', lines[6])
+        self.assertTrue(lines[-2].startswith(
+            'yatube_request_duration_seconds_sum'
+        ))
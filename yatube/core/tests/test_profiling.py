@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..profiling import (
+    EXTENSION, RESPONSE_HEADER, StackSampler, _handle, categorize, make_token,
+    read_stacks, write_stacks,
+)
+
+TEMP_PROFILING_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(PROFILING_DIR=TEMP_PROFILING_DIR, PROFILING_RATE=0)
+class ProfilingTest(TestCase):
+    """TestCase для выборочного профилирования запросов"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = Post.objects.create(
+            author=User.objects.create_user(username='author'),
+            text='Пост для профиля',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+        self.url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}
+        )
+
+    def profiles(self, view='posts.post_detail'):
+        directory = os.path.join(TEMP_PROFILING_DIR, view)
+        if not os.path.isdir(directory):
+            return []
+        return os.listdir(directory)
+
+    def test_not_sampled(self):
+        """Без заголовка и с нулевой долей профиль не пишется"""
+        response = self.client.get(self.url)
+        self.assertNotIn(RESPONSE_HEADER, response)
+        self.assertEqual(self.profiles(), [])
+
+    def test_signed_header(self):
+        """Подписанный заголовок включает профилирование"""
+        response = self.client.get(
+            self.url, HTTP_X_YATUBE_PROFILE=make_token()
+        )
+        self.assertEqual(
+            self.profiles(), [f'{response[RESPONSE_HEADER]}{EXTENSION}']
+        )
+
+    def test_forged_header(self):
+        """Заголовок без верной подписи игнорируется"""
+        response = self.client.get(self.url, HTTP_X_YATUBE_PROFILE='profile')
+        self.assertNotIn(RESPONSE_HEADER, response)
+        self.assertEqual(self.profiles(), [])
+
+    @override_settings(PROFILING_RATE=1, PROFILING_MAX_FILES=2)
+    def test_rate_and_limit(self):
+        """Доля запросов профилируется, старые профили удаляются"""
+        for _ in range(3):
+            response = self.client.get(self.url)
+        self.assertNotIn(RESPONSE_HEADER, response)
+        self.assertEqual(len(self.profiles()), 2)
+
+    def test_sampler_records_request_stacks(self):
+        """Сэмплер снимает стеки ниже корня запроса"""
+        def slow_view(request):
+            time.sleep(0.05)
+
+        with StackSampler(0.005) as sampler:
+            _handle(slow_view, None)
+        self.assertTrue(sampler.stacks, 'Сэмплер не снял ни одного стека')
+        for stack in sampler.stacks:
+            self.assertTrue(stack.startswith('_handle ('), stack)
+            self.assertIn('slow_view', stack)
+
+    def test_collapse_command(self):
+        """Снимки сводятся в collapsed stacks по представлениям"""
+        directory = os.path.join(TEMP_PROFILING_DIR, 'posts.post_detail')
+        os.makedirs(directory)
+        sql = f'execute (django{os.sep}db{os.sep}utils.py:1)'
+        write_stacks(
+            os.path.join(directory, f'1{EXTENSION}'),
+            {f'_handle;view;{sql}': 3, '_handle;view': 1},
+        )
+        write_stacks(
+            os.path.join(directory, f'2{EXTENSION}'),
+            {f'_handle;view;{sql}': 2},
+        )
+        output = os.path.join(TEMP_PROFILING_DIR, 'out')
+        out = StringIO()
+        call_command('collapse_profiles', output=output, stdout=out)
+        self.assertIn(
+            'posts.post_detail: запросов 2, снимков 6', out.getvalue()
+        )
+        self.assertIn('sql 83%', out.getvalue())
+        self.assertEqual(
+            read_stacks(
+                os.path.join(output, f'posts.post_detail{EXTENSION}')
+            ),
+            {f'_handle;view;{sql}': 5, '_handle;view': 1},
+        )
+        out = StringIO()
+        call_command('collapse_profiles', output=output, stdout=out)
+        self.assertNotIn('out:', out.getvalue())
+        self.assertIn(
+            'posts.post_detail: запросов 2, снимков 6', out.getvalue()
+        )
+
+    def test_categorize(self):
+        """Время стека относится к ближайшей к вершине категории"""
+        sep = os.sep
+        render = f'render (django{sep}template{sep}base.py:1)'
+        stacks = {
+            f'view;execute (django{sep}db{sep}utils.py:1)': 10,
+            f'view;{render};query (django{sep}db{sep}models.py:1)': 5,
+            f'view;{render};get_thumbnail (sorl{sep}thumbnail{sep}'
+            f'shortcuts.py:1);resize (PIL{sep}Image.py:1)': 4,
+            f'view;{render};get_thumbnail (sorl{sep}thumbnail{sep}'
+            f'shortcuts.py:1)': 3,
+            f'view;{render}': 2,
+            'view': 1,
+        }
+        totals = categorize(stacks)
+        self.assertEqual(totals['sql'], 15)
+        self.assertEqual(totals['pillow'], 4)
+        self.assertEqual(totals['sorl'], 3)
+        self.assertEqual(totals['templates'], 2)
+        self.assertEqual(totals['other'], 1)
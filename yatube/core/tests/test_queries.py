@@ -0,0 +1,41 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from posts import views
+
+from ..queries import QueryRecorder
+
+
+class QueryBudgetMiddlewareTest(TestCase):
+    """TestCase для учёта SQL-запросов"""
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_over_budget_is_logged(self):
+        """Превышение бюджета запросов попадает в лог"""
+        with mock.patch.object(views.index, 'query_budget', 0):
+            with self.assertLogs('core.queries', 'WARNING') as logs:
+                self.guest_client.get('/')
+        self.assertIn('при бюджете 0', logs.output[0])
+
+    def test_recorder_finds_duplicates(self):
+        """QueryRecorder считает запросы и находит повторы"""
+        with QueryRecorder() as recorder:
+            self.guest_client.get('/')
+            cache.clear()
+            self.guest_client.get('/')
+        self.assertEqual(recorder.count, 2)
+        self.assertEqual(len(recorder.duplicates), 1)
+
+    def test_middlewares_share_recorder(self):
+        """Метрики и бюджет запросов записывают каждый SQL один раз"""
+        with CaptureQueriesContext(connection) as captured:
+            response = self.guest_client.get('/')
+        recorder = response.wsgi_request.query_recorder
+        self.assertEqual(recorder.count, len(captured))
+        self.assertEqual(len(connection.execute_wrappers), 0)
@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from posts.models import Follow, Post, User
+
+from ..routers import (
+    STICKY_COOKIE, ReplicaMiddleware, replica_safe, use_replica,
+)
+
+
+@replica_safe
+def read_view(request):
+    return HttpResponse(router.db_for_read(Post))
+
+
+def write_view(request):
+    return HttpResponse(router.db_for_read(Post))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTest(SimpleTestCase):
+    """TestCase для чтения с реплик"""
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def call(self, request, view):
+        def get_response(request):
+            response = middleware.process_view(request, view, (), {})
+            return response or view(request)
+        middleware = ReplicaMiddleware(get_response)
+        return middleware(request)
+
+    def test_router(self):
+        """Чтение с реплики только внутри use_replica, запись в default"""
+        self.assertEqual(router.db_for_read(Post), 'default')
+        with use_replica():
+            self.assertEqual(router.db_for_read(Post), 'replica1')
+            self.assertEqual(router.db_for_write(Post), 'default')
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_sessions_and_users_from_primary(self):
+        """Сессии и пользователи читаются из default и внутри use_replica"""
+        with use_replica():
+            self.assertEqual(router.db_for_read(Session), 'default')
+            self.assertEqual(router.db_for_read(User), 'default')
+
+    def test_replica_safe_views(self):
+        """Помеченные представления читают с реплики, остальные — нет"""
+        request = self.factory.get('/')
+        self.assertEqual(self.call(request, read_view).content, b'replica1')
+        self.assertEqual(self.call(request, write_view).content, b'default')
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_read_your_writes(self):
+        """После записи клиент читает с основной базы"""
+        response = self.call(self.factory.post('/'), write_view)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        self.assertEqual(self.call(request, read_view).content, b'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaFileTest(TransactionTestCase):
+    """TestCase для чтения с отстающей реплики в отдельном файле SQLite"""
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        connections.databases['replica1'] = dict(
+            connections.databases['default'],
+            NAME=os.path.join(self.directory, 'replica.sqlite3'),
+            TEST={},
+        )
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.create(author=self.author, text='Пост на реплике')
+        call_command('sync_replicas', stdout=StringIO())
+
+    def tearDown(self):
+        connections['replica1'].close()
+        del connections['replica1']
+        del connections.databases['replica1']
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    @override_settings(REPLICA_MAX_LAG=0)
+    def test_new_session_read_from_primary(self):
+        """Сессия, которой ещё нет на реплике, не разлогинивает"""
+        Post.objects.create(author=self.author, text='Пост после копии')
+        client = Client()
+        client.force_login(self.reader)
+        self.assertFalse(
+            Session.objects.using('replica1').exists(),
+            'Новая сессия есть только в default',
+        )
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Пост на реплике')
+        self.assertNotContains(response, 'Пост после копии')
+
+    def test_listing_not_cached_from_lagging_replica(self):
+        """Страница сразу после записи собирается из default"""
+        guest = Client()
+        Post.objects.create(author=self.author, text='Пост после копии')
+        self.assertContains(guest.get(reverse('posts:index')), 'после копии')
+        with override_settings(REPLICA_MAX_LAG=0):
+            Post.objects.create(author=self.author, text='Ещё не на реплике')
+            self.assertNotContains(
+                guest.get(reverse('posts:index')), 'Ещё не на реплике'
+            )
+            call_command('sync_replicas', stdout=StringIO())
+            self.assertContains(
+                guest.get(reverse('posts:index')),
+                'Ещё не на реплике',
+                msg_prefix='После синхронизации реплик кеш не сброшен',
+            )
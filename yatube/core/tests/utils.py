@@ -0,0 +1,66 @@
+from urllib.parse import urlsplit
+
+from django.db import connection
+from django.urls import resolve
+
+from ..queries import QueryRecorder
+
+
+class QueryBudgetMixin:
+    """Проверка бюджета SQL-запросов для TestCase."""
+    def assertWithinQueryBudget(self, client, url, budget=None):
+        """
+        Запрашивает url и проверяет, что представление уложилось
+        в объявленный бюджет и не выполняло одинаковых запросов.
+        """
+        if budget is None:
+            budget = getattr(
+                resolve(urlsplit(url).path).func, 'query_budget', None
+            )
+            self.assertIsNotNone(
+                budget, f'Для {url} не объявлен бюджет запросов'
+            )
+        with QueryRecorder() as recorder:
+            response = client.get(url)
+        sql = '\n'.join(query for query, duration in recorder.queries)
+        self.assertLessEqual(
+            recorder.count,
+            budget,
+            f'{url}: {recorder.count} SQL-запросов при бюджете {budget}:\n'
+            f'{sql}'
+        )
+        self.assertEqual(
+            recorder.duplicates,
+            {},
+            f'{url}: одинаковые SQL-запросы выполняются повторно'
+        )
+        return response
+
+
+class QueryPlanMixin:
+    """Проверка планов SQL-запросов представления для TestCase (SQLite)."""
+    def assertQueriesUseIndexes(self, client, url):
+        """
+        Запрашивает url и проверяет по EXPLAIN QUERY PLAN, что каждый
+        SELECT читает таблицы через индекс и обходится без сортировки.
+        """
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            response = client.get(url)
+        for sql, params in queries:
+            if not sql.startswith('SELECT'):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = [row[-1] for row in cursor.fetchall()]
+            message = f'{url}: план {plan} для запроса\n{sql}'
+            for step in plan:
+                self.assertNotIn('TEMP B-TREE', step, message)
+                if step.startswith('SCAN'):
+                    self.assertIn('INDEX', step, message)
+        return response
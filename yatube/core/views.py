@@ -1,6 +1,12 @@
 from http import HTTPStatus
 
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_safe
+
+from . import metrics as request_metrics
 
 
 def page_not_found(request, exception):
@@ -26,3 +32,33 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics_allowed(request):
+    """
+    Метрики видит персонал сайта или Prometheus с заголовком
+    Authorization: Bearer METRICS_TOKEN. Адрес клиента не проверяется:
+    за обратным прокси все запросы приходят с 127.0.0.1.
+    """
+    if request.user.is_active and request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    scheme, _, credentials = request.META.get(
+        'HTTP_AUTHORIZATION', ''
+    ).partition(' ')
+    return bool(token) and scheme.lower() == 'bearer' and (
+        constant_time_compare(credentials, token)
+    )
+
+
+@require_safe
+def metrics(request):
+    """Счётчики запросов всех процессов в формате Prometheus."""
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(
+        request_metrics.render(
+            request_metrics.collect(settings.METRICS_DIR)
+        ),
+        content_type=request_metrics.CONTENT_TYPE,
+    )
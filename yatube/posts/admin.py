@@ -1,15 +1,155 @@
+from datetime import datetime
+
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db.models import Max, Min, QuerySet
+from django.utils import timezone
+from django.utils.functional import cached_property
 
 from .models import Group, Post
+from .search import get_backend, terms
+from .utils import CursorPaginator
+
+# Параметр курсора страницы в адресе списка
+CURSOR_VAR = 'cursor'
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор без точного COUNT(*): число строк всей таблицы оценивается
+    по максимальному ключу, с фильтрами строки считаются не дальше
+    ADMIN_COUNT_LIMIT.
+    """
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            return queryset.aggregate(last=Max('pk'))['last'] or 0
+        return queryset.order_by()[:settings.ADMIN_COUNT_LIMIT].count()
+
+
+class IndexedDatesQuerySet(QuerySet):
+    """
+    dates() для date_hierarchy без DISTINCT по всей таблице: границы
+    берутся из MIN/MAX, а каждый год или месяц проверяется запросом
+    EXISTS по диапазону индексированного поля.
+    """
+    def dates(self, field_name, kind, order='ASC'):
+        if kind not in ('year', 'month'):
+            return super().dates(field_name, kind, order)
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if bounds['first'] is None:
+            return []
+        first = timezone.localtime(bounds['first'])
+        last = timezone.localtime(bounds['last'])
+        periods = []
+        year, month = first.year, first.month if kind == 'month' else 1
+        while (year, month) <= (last.year, last.month):
+            if kind == 'year':
+                end = (year + 1, 1)
+            else:
+                end = (year + month // 12, month % 12 + 1)
+            if self.filter(**{
+                f'{field_name}__gte': timezone.make_aware(
+                    datetime(year, month, 1)
+                ),
+                f'{field_name}__lt': timezone.make_aware(datetime(*end, 1)),
+            }).exists():
+                periods.append(datetime(year, month, 1).date())
+            year, month = end
+        return periods if order == 'ASC' else periods[::-1]
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Список, который листается по курсору (-pub_date, -pk), пока
+    не выбрана сортировка по столбцу: глубокие страницы не требуют
+    OFFSET. При сортировке по столбцу работает обычная пагинация.
+    """
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        self.keyset = ORDER_VAR not in self.params
+        if not self.keyset:
+            return super().get_results(request)
+        # страница выбирается по одному ключу, сами строки загружаются
+        # ниже вместе с list_select_related
+        paginator = CursorPaginator(
+            self.queryset.values('pub_date', 'pk'), self.list_per_page
+        )
+        page = paginator.get_cursor_page(self.params.get(CURSOR_VAR))
+        self.result_count = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        ).count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        # формсет list_editable ждёт QuerySet, а не список
+        self.result_list = self.queryset.filter(
+            pk__in=[row['pk'] for row in page.object_list]
+        )
+        self.can_show_all = False
+        self.multi_page = page.has_other_pages()
+        self.paginator = paginator
+        self.page = page
+
+    def cursor_url(self, cursor):
+        if cursor is None:
+            return None
+        return self.get_query_string({CURSOR_VAR: cursor})
+
+    @property
+    def first_url(self):
+        return self.get_query_string(remove=[CURSOR_VAR])
+
+    @property
+    def previous_url(self):
+        return self.cursor_url(self.page.previous_cursor)
+
+    @property
+    def next_url(self):
+        return self.cursor_url(self.page.next_cursor)
+
+    @property
+    def last_url(self):
+        return self.cursor_url(self.page.last_cursor)
 
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
     list_editable = ('group',)
+    autocomplete_fields = ('author', 'group')
+    date_hierarchy = 'pub_date'
+    ordering = ('-pub_date', '-pk')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return IndexedDatesQuerySet(
+            model=queryset.model, query=queryset.query, using=queryset.db
+        )
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        # поиск по полнотекстовому индексу вместо LIKE '%...%'
+        if not terms(search_term):
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return get_backend().filter(queryset, search_term), False
 
 
 @admin.register(Group)
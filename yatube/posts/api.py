@@ -0,0 +1,278 @@
+"""
+JSON API v1 только для чтения: посты, группы, профили, комментарии и
+лента подписок.
+
+Ответы собираются из values(): экземпляры моделей не создаются, а в
+SELECT попадают только поля из ?fields= и поля ключа курсора. Связанные
+таблицы присоединяются, только если выбрано их поле. Страницы листаются
+курсором из ?cursor= (см. posts.utils.CursorPaginator), размер страницы
+задаётся ?limit= не больше API_MAX_PAGE_SIZE.
+"""
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_safe
+
+from core.queries import query_budget
+from core.routers import replica_safe
+
+from .feed import fan_out_on_read_authors
+from .models import Comment, FeedEntry, Group, Post, User
+from .utils import CursorPaginator
+
+# Поля ответа и пути к ним для values()
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated': 'updated',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+# Лента читается из FeedEntry: ключ и дата берутся из самой записи
+FEED_FIELDS = {
+    name: f'post__{lookup}' for name, lookup in POST_FIELDS.items()
+}
+FEED_FIELDS.update(id='post_id', pub_date='pub_date')
+GROUP_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'slug': 'slug',
+    'description': 'description',
+    'posts_count': 'posts_count',
+}
+AUTHOR_FIELDS = {
+    'id': 'id',
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'posts_count': 'stats__posts_count',
+    'followers_count': 'stats__followers_count',
+    'following_count': 'stats__following_count',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+}
+
+POST_ORDERING = ('-pub_date', '-id')
+
+
+def _image_url(name):
+    return default_storage.url(name) if name else None
+
+
+# Преобразования значений из базы в значения ответа
+CONVERTERS = {
+    'image': _image_url,
+}
+
+
+class ApiError(Exception):
+    """Ошибка запроса, которая возвращается клиенту в JSON."""
+    status = HTTPStatus.BAD_REQUEST
+
+
+class NotAuthenticated(ApiError):
+    status = HTTPStatus.UNAUTHORIZED
+
+
+def json_view(view):
+    """Отдаёт словарь из представления как JSON, ошибки — как {'detail'}."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            data = view(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'detail': str(error)}, status=error.status)
+        except Http404:
+            return JsonResponse(
+                {'detail': 'Не найдено'}, status=HTTPStatus.NOT_FOUND
+            )
+        return JsonResponse(data, json_dumps_params={'ensure_ascii': False})
+    return wrapper
+
+
+def selected(request, fields):
+    """Имена полей из ?fields=, без параметра — все поля."""
+    value = request.GET.get('fields')
+    if not value:
+        return list(fields)
+    names = list(dict.fromkeys(
+        name.strip() for name in value.split(',') if name.strip()
+    ))
+    unknown = [name for name in names if name not in fields]
+    if unknown or not names:
+        raise ApiError(
+            f'Неизвестные поля: {", ".join(unknown)}. '
+            f'Доступны: {", ".join(fields)}'
+        )
+    return names
+
+
+def page_size(request, default=None):
+    default = default or settings.NUMB_OF_POST
+    value = request.GET.get('limit')
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ApiError('limit должен быть целым числом')
+    return min(max(limit, 1), settings.API_MAX_PAGE_SIZE)
+
+
+def serialize(row, fields, names):
+    item = {}
+    for name in names:
+        value = row[fields[name]]
+        convert = CONVERTERS.get(name)
+        item[name] = convert(value) if convert else value
+    return item
+
+
+def get_row_or_404(queryset, fields, names=None):
+    """Одна строка values() с выбранными полями или Http404."""
+    names = list(fields) if names is None else names
+    rows = list(queryset.values(*(fields[name] for name in names))[:1])
+    if not rows:
+        raise Http404
+    return serialize(rows[0], fields, names)
+
+
+def cursor_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return f'{request.path}?{params.urlencode()}'
+
+
+def paginate(request, queryset, fields, ordering=POST_ORDERING,
+             names=None, per_page=None):
+    """Страница values() по курсору вместе со ссылками на соседние."""
+    if names is None:
+        names = selected(request, fields)
+    keys = [field.lstrip('-') for field in ordering]
+    lookups = dict.fromkeys(keys + [fields[name] for name in names])
+    paginator = CursorPaginator(
+        queryset.values(*lookups), page_size(request, per_page), ordering
+    )
+    page = paginator.get_cursor_page(request.GET.get('cursor'))
+    return {
+        'results': [
+            serialize(row, fields, names) for row in page.object_list
+        ],
+        'next': cursor_url(request, page.next_cursor),
+        'previous': cursor_url(request, page.previous_cursor),
+    }
+
+
+@query_budget(1)
+@replica_safe
+@require_safe
+@json_view
+def posts(request):
+    """Лента всех постов"""
+    return paginate(request, Post.objects.all(), POST_FIELDS)
+
+
+@query_budget(1)
+@replica_safe
+@require_safe
+@json_view
+def groups(request):
+    """Список групп"""
+    return paginate(
+        request, Group.objects.all(), GROUP_FIELDS, ordering=('id',)
+    )
+
+
+@query_budget(2)
+@replica_safe
+@require_safe
+@json_view
+def group_posts(request, slug):
+    """Группа и её посты"""
+    group = get_row_or_404(Group.objects.filter(slug=slug), GROUP_FIELDS)
+    data = paginate(
+        request, Post.objects.filter(group_id=group['id']), POST_FIELDS
+    )
+    data['group'] = group
+    return data
+
+
+@query_budget(2)
+@replica_safe
+@require_safe
+@json_view
+def profile(request, username):
+    """Автор и его посты"""
+    author = get_row_or_404(
+        User.objects.filter(username=username), AUTHOR_FIELDS
+    )
+    data = paginate(
+        request, Post.objects.filter(author_id=author['id']), POST_FIELDS
+    )
+    data['author'] = author
+    return data
+
+
+@query_budget(2)
+@replica_safe
+@require_safe
+@json_view
+def post_detail(request, post_id):
+    """
+    Пост и страница его комментариев; ?fields= выбирает поля поста,
+    а ?cursor= листает комментарии.
+    """
+    post = get_row_or_404(
+        Post.objects.filter(pk=post_id),
+        POST_FIELDS,
+        selected(request, POST_FIELDS),
+    )
+    return {
+        'post': post,
+        'comments': paginate(
+            request,
+            Comment.objects.filter(post_id=post_id),
+            COMMENT_FIELDS,
+            ordering=('created', 'id'),
+            names=list(COMMENT_FIELDS),
+            per_page=settings.NUMB_OF_COMMENTS,
+        ),
+    }
+
+
+@query_budget(4)
+@replica_safe
+@require_safe
+@json_view
+def follow_feed(request):
+    """Лента подписок текущего пользователя"""
+    if not request.user.is_authenticated:
+        raise NotAuthenticated('Нужна авторизация')
+    popular_authors = fan_out_on_read_authors(request.user)
+    if popular_authors:
+        posts = Post.objects.filter(
+            Q(pk__in=FeedEntry.objects.filter(
+                user=request.user
+            ).values('post'))
+            | Q(author__in=popular_authors)
+        )
+        return paginate(request, posts, POST_FIELDS)
+    return paginate(
+        request,
+        FeedEntry.objects.filter(user=request.user),
+        FEED_FIELDS,
+        ordering=('-pub_date', '-post_id'),
+    )
@@ -0,0 +1,224 @@
+"""
+Версионированный кеш страниц со списками постов.
+
+Ключи страниц содержат поколение контента. Любое изменение постов,
+групп, пользователей или подписок сдвигает поколение, и все страницы
+пересобираются при следующем обращении. Поэтому время жизни кеша можно
+делать большим: устаревшие страницы просто перестают запрашиваться.
+
+Сдвиг поколения делает промахом сразу все страницы. Чтобы воркеры не
+собирали одну и ту же страницу одновременно, пересборку ведёт тот, кто
+первым взял блокировку в общем кеше, остальные ждут готовую страницу.
+
+Попадания и промахи считаются в счётчиках процесса core.metrics, а не
+в общем кеше: иначе каждый показ страницы брал бы блокировку записи
+общего кеша SQLite.
+"""
+import copy
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.middleware.cache import CacheMiddleware
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import decorator_from_middleware_with_args
+from django.views.decorators.http import condition
+
+from core import metrics
+from core.routers import use_primary
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'posts:generation'
+CACHE_METRIC = 'yatube_listing_cache_total'
+# Интервал проверки готовности страницы, которую собирает другой процесс
+REBUILD_POLL: float = 0.05
+
+
+def bump_generation():
+    """Начинает новое поколение кеша; значение — время изменения."""
+    generation = time.time()
+    cache.set(GENERATION_KEY, generation, None)
+    return generation
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def _count(result):
+    try:
+        metrics.increment(CACHE_METRIC, result=result)
+    except OSError:
+        logger.exception('Не удалось записать счётчик кеша страниц')
+
+
+def get_stats():
+    """Счётчики попаданий и промахов кеша страниц всех процессов."""
+    return {
+        'generation': get_generation(),
+        'hits': int(metrics.total(CACHE_METRIC, result='hit')),
+        'misses': int(metrics.total(CACHE_METRIC, result='miss')),
+    }
+
+
+class VersionedCacheMiddleware(CacheMiddleware):
+    """CacheMiddleware, у которого префикс ключа включает поколение."""
+    def _for_request(self, request):
+        # экземпляр общий для потоков, поэтому префикс меняем у копии
+        versioned = copy.copy(self)
+        versioned.key_prefix = (
+            f'{self.key_prefix}.{request._cache_generation}'
+        )
+        return versioned
+
+    def _rebuild_lock(self, request):
+        # ключи страниц различаются по Cookie (Vary), поэтому и
+        # блокировка берётся на адрес вместе с куками
+        raw = request.build_absolute_uri() + request.META.get(
+            'HTTP_COOKIE', ''
+        )
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f'{self.key_prefix}.{request._cache_generation}.lock.{digest}'
+
+    def _wait_for_rebuild(self, request, versioned):
+        """
+        Промах кеша: берёт блокировку пересборки или ждёт страницу,
+        которую собирает владелец блокировки. None — собирать самому.
+        """
+        lock = self._rebuild_lock(request)
+        if self.cache.add(lock, 1, settings.PAGE_REBUILD_LOCK_TIMEOUT):
+            request._cache_rebuild_lock = lock
+            return None
+        deadline = time.monotonic() + settings.PAGE_REBUILD_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(REBUILD_POLL)
+            response = super(
+                VersionedCacheMiddleware, versioned
+            ).process_request(request)
+            if response is not None:
+                return response
+        # владелец блокировки не успел: страница соберётся здесь
+        return None
+
+    def process_request(self, request):
+        # поколение фиксируется в начале запроса: страница, собранная
+        # во время изменения, попадёт в кеш под старым ключом
+        request._cache_generation = get_generation()
+        versioned = self._for_request(request)
+        response = super(
+            VersionedCacheMiddleware, versioned
+        ).process_request(request)
+        if request.method in ('GET', 'HEAD'):
+            _count('miss' if response is None else 'hit')
+            if response is None:
+                response = self._wait_for_rebuild(request, versioned)
+        return response
+
+    def process_response(self, request, response):
+        if not hasattr(request, '_cache_generation'):
+            return response
+        try:
+            return super(
+                VersionedCacheMiddleware, self._for_request(request)
+            ).process_response(request, response)
+        finally:
+            lock = getattr(request, '_cache_rebuild_lock', None)
+            if lock is not None:
+                self.cache.delete(lock)
+
+
+def cache_listing(key_prefix, timeout=None):
+    """Аналог cache_page с ключом, зависящим от поколения контента."""
+    cache_page = decorator_from_middleware_with_args(
+        VersionedCacheMiddleware
+    )(
+        cache_timeout=timeout or settings.LISTING_CACHE_TIMEOUT,
+        key_prefix=key_prefix,
+    )
+
+    def decorator(view):
+        return primary_while_lagging(cache_page(view))
+    return decorator
+
+
+def _request_generation(request):
+    # валидаторы и кеш страницы должны видеть одно поколение
+    if not hasattr(request, '_validator_generation'):
+        request._validator_generation = get_generation()
+    return request._validator_generation
+
+
+def primary_while_lagging(view):
+    """
+    Первые REPLICA_MAX_LAG секунд после изменения контента реплика может
+    его ещё не содержать, а собранная с неё страница закешировалась бы
+    под новым поколением и отдавалась бы с его ETag. В это время
+    представление читает из default.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        lag = time.time() - _request_generation(request)
+        if lag < settings.REPLICA_MAX_LAG:
+            with use_primary():
+                return view(request, *args, **kwargs)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def page_etag(request, *parts):
+    """
+    ETag страницы без запросов к базе: поколение контента, адрес
+    и куки сессии и CSRF, которые меняются при входе и выходе.
+    """
+    raw = ':'.join(str(part) for part in (
+        _request_generation(request),
+        request.get_full_path(),
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME, ''),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        *parts,
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def listing_etag(request, *args, **kwargs):
+    return page_etag(request)
+
+
+def listing_last_modified(request, *args, **kwargs):
+    return datetime.fromtimestamp(
+        _request_generation(request), tz=timezone.utc
+    )
+
+
+def conditional_page(etag_func=listing_etag,
+                     last_modified_func=listing_last_modified):
+    """
+    Отвечает 304 на If-None-Match/If-Modified-Since без вызова
+    представления. Браузер не хранит страницу молча: каждый показ
+    перепроверяется, поэтому срок жизни от кеша страниц убирается.
+    """
+    def decorator(view):
+        conditional = condition(
+            etag_func=etag_func, last_modified_func=last_modified_func
+        )(view)
+
+        @primary_while_lagging
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            del response['Expires']
+            patch_cache_control(
+                response, private=True, no_cache=True, max_age=0
+            )
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,115 @@
+"""
+Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются F-выражениями в сигналах (posts.signals), поэтому
+параллельные запросы не теряют изменения. Расхождения исправляет
+команда manage.py recount.
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def _shift(queryset, **deltas):
+    return queryset.update(**{
+        field: Greatest(F(field) + delta, Value(0))
+        for field, delta in deltas.items()
+    })
+
+
+def change_user(user_id, **deltas):
+    # строки нет только у удаляемого пользователя или после сбоя,
+    # во втором случае её восстановит manage.py recount
+    _shift(UserStats.objects.filter(user_id=user_id), **deltas)
+
+
+def change_group(group_id, delta):
+    if group_id is not None:
+        _shift(Group.objects.filter(pk=group_id), posts_count=delta)
+
+
+def change_post(post_id, delta):
+    _shift(Post.objects.filter(pk=post_id), comments_count=delta)
+
+
+def post_added(post):
+    with transaction.atomic():
+        change_user(post.author_id, posts_count=1)
+        change_group(post.group_id, 1)
+
+
+def post_removed(post):
+    with transaction.atomic():
+        change_user(post.author_id, posts_count=-1)
+        change_group(post.group_id, -1)
+
+
+def post_moved(old_group_id, new_group_id):
+    if old_group_id != new_group_id:
+        with transaction.atomic():
+            change_group(old_group_id, -1)
+            change_group(new_group_id, 1)
+
+
+def follow_changed(follow, delta):
+    with transaction.atomic():
+        change_user(follow.author_id, followers_count=delta)
+        change_user(follow.user_id, following_count=delta)
+
+
+def _count(model, field):
+    """Подзапрос с количеством строк model, ссылающихся на OuterRef."""
+    rows = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows), Value(0))
+
+
+def counters():
+    """Описание счётчиков: (название, queryset, поле, выражение)."""
+    users = UserStats.objects.all()
+    return (
+        ('user.posts', users, 'posts_count',
+         _count(Post, 'author')),
+        ('user.followers', users, 'followers_count',
+         _count(Follow, 'author')),
+        ('user.following', users, 'following_count',
+         _count(Follow, 'user')),
+        ('group.posts', Group.objects.all(), 'posts_count',
+         _count(Post, 'group')),
+        ('post.comments', Post.objects.all(), 'comments_count',
+         _count(Comment, 'post')),
+    )
+
+
+def repair():
+    """
+    Пересчитывает все счётчики пачкой UPDATE-запросов.
+    Возвращает число исправленных строк по каждому счётчику.
+    """
+    UserStats.objects.bulk_create(
+        (
+            UserStats(user_id=user_id)
+            for user_id in User.objects.filter(
+                stats__isnull=True
+            ).values_list('pk', flat=True).iterator()
+        ),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    fixed = {}
+    for name, queryset, field, actual in counters():
+        drifted = queryset.annotate(actual=actual).exclude(
+            **{field: F('actual')}
+        )
+        with transaction.atomic():
+            fixed[name] = queryset.filter(
+                pk__in=Subquery(drifted.values('pk'))
+            ).update(**{field: actual})
+    return fixed
@@ -0,0 +1,182 @@
+"""
+Уведомления о новых постах для ленты подписок (server-sent events).
+
+Страница follow открывает одно соединение EventSource и показывает
+«новых постов: N» вместо того, чтобы читатель перезагружал ленту.
+Публикация поста будит через broker открытые потоки подписчиков
+автора в этом же процессе, и поток пересчитывает новые посты одним
+запросом по индексу. Посты, опубликованные в других процессах,
+находит такая же сверка раз в EVENTS_RECHECK секунд.
+
+Долгий поток держит только ASGI-мост (core.asgi): он вызывает
+async_stream и ждёт событий в цикле событий, не занимая потоки пула.
+Под WSGI каждая открытая лента занимала бы поток сервера, поэтому там
+ответ содержит одну сверку и сразу закрывается, а EventSource сам
+переподключается через EVENTS_POLL_RETRY миллисекунд: получается
+короткий опрос без изменений на странице.
+"""
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from .models import Follow, Post
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(True)
+
+
+class Subscription:
+    """Открытый поток событий одного читателя."""
+    def __init__(self, authors):
+        self.authors = authors
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._waiters = set()
+
+    def notify(self):
+        self._event.set()
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def wait(self, timeout):
+        """Ждёт уведомления не дольше timeout; True — уведомление было."""
+        notified = self._event.wait(timeout)
+        self._event.clear()
+        return notified
+
+    async def wait_async(self, timeout):
+        loop = asyncio.get_running_loop()
+        waiter = (loop, loop.create_future())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            # событие проверяется после регистрации: уведомление между
+            # проверкой и ожиданием не теряется
+            if not self._event.is_set():
+                await asyncio.wait_for(waiter[1], timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+            self._event.clear()
+
+
+class Broker:
+    """Рассылка уведомлений о постах внутри процесса."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, authors):
+        subscription = Subscription(frozenset(authors))
+        with self._lock:
+            for author_id in subscription.authors:
+                self._subscriptions[author_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for author_id in subscription.authors:
+                subscribers = self._subscriptions.get(author_id)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[author_id]
+
+    def publish(self, author_id):
+        with self._lock:
+            subscribers = list(self._subscriptions.get(author_id, ()))
+        for subscription in subscribers:
+            subscription.notify()
+
+
+broker = Broker()
+
+
+def parse_since(value):
+    """Момент отрисовки ленты из ?since=; без него — текущий момент."""
+    try:
+        timestamp = float(value)
+    except (TypeError, ValueError):
+        timestamp = time.time()
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def count_new(user_id, since):
+    return Post.objects.filter(
+        author__following__user_id=user_id, pub_date__gt=since
+    ).count()
+
+
+def message(event, data):
+    return f'event: {event}\ndata: {data}\n\n'.encode()
+
+
+class EventStream:
+    """
+    Поток событий new_posts: число постов подписок новее since.
+    В async_stream событие отправляется при изменении числа, в остальное
+    время раз в EVENTS_RECHECK секунд уходит комментарий-пинг.
+    """
+    def __init__(self, user_id, since):
+        self.user_id = user_id
+        self.since = since
+        self.subscription = None
+        self.count = None
+        self.deadline = time.monotonic() + settings.EVENTS_MAX_DURATION
+
+    def authors(self):
+        return list(
+            Follow.objects.filter(user_id=self.user_id).values_list(
+                'author_id', flat=True
+            )
+        )
+
+    def event(self, count):
+        if count == self.count:
+            return b': ping\n\n'
+        self.count = count
+        return message('new_posts', count)
+
+    def __iter__(self):
+        """Одна сверка для WSGI: поток сервера сразу освобождается."""
+        yield f'retry: {settings.EVENTS_POLL_RETRY}\n\n'.encode()
+        yield self.event(count_new(self.user_id, self.since))
+
+    async def async_stream(self, run):
+        """Тот же поток для ASGI: run выполняет запросы к базе в пуле."""
+        self.subscription = broker.subscribe(await run(self.authors))
+        yield f'retry: {settings.EVENTS_RETRY}\n\n'.encode()
+        while time.monotonic() < self.deadline:
+            count = await run(count_new, self.user_id, self.since)
+            yield self.event(count)
+            await self.subscription.wait_async(settings.EVENTS_RECHECK)
+
+    def close(self):
+        if self.subscription is not None:
+            broker.unsubscribe(self.subscription)
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    """Ответ text/event-stream, который ASGI-мост читает асинхронно."""
+    def __init__(self, stream):
+        super().__init__(stream, content_type='text/event-stream')
+        self.stream = stream
+        self['Cache-Control'] = 'no-cache'
+        # nginx не должен буферизовать поток
+        self['X-Accel-Buffering'] = 'no'
+
+    def async_stream(self, run):
+        return self.stream.async_stream(run)
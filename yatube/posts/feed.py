@@ -0,0 +1,146 @@
+"""
+Лента подписок с раскладкой при записи (fan-out-on-write).
+
+При публикации пост копируется в ленты подписчиков автора, поэтому
+чтение ленты — один проход по индексу (user, -pub_date, -post).
+Для авторов, у которых подписчиков больше FEED_FANOUT_LIMIT, раскладка
+не выполняется: их посты подмешиваются при чтении (fan-out-on-read).
+Когда автор снова опускается до лимита, его посты раскладываются
+по лентам всех подписчиков заново (catch_up).
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import FeedEntry, Follow, Post, UserStats
+from .utils import paginate_page
+
+# Размер пачки для bulk_create записей ленты
+BATCH_SIZE: int = 500
+
+
+def _bulk_insert(entries):
+    FeedEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    limit = settings.FEED_FANOUT_LIMIT
+    followers = list(
+        Follow.objects.filter(author_id=post.author_id).values_list(
+            'user_id', flat=True
+        )[:limit + 1]
+    )
+    if len(followers) > limit:
+        return
+    _bulk_insert(
+        FeedEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in followers
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту новой подписки уже опубликованные посты."""
+    if UserStats.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.FEED_FANOUT_LIMIT,
+    ).exists():
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )
+    _bulk_insert(
+        FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in posts.iterator()
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    FeedEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def catch_up(author_id):
+    """
+    Раскладывает посты автора, который после отписки вернулся к
+    FEED_FANOUT_LIMIT подписчиков: его посты снова читаются только из
+    FeedEntry, а опубликованные сверх лимита посты и подписки того
+    времени, оставшиеся без backfill, в лентах отсутствуют. Один
+    INSERT ... SELECT, строки не загружаются в процесс.
+    """
+    if not UserStats.objects.filter(
+        user_id=author_id, followers_count=settings.FEED_FANOUT_LIMIT
+    ).exists():
+        return 0
+    feed, follow, post = (
+        model._meta.db_table for model in (FeedEntry, Follow, Post)
+    )
+    # строки собирает сама база, уже разложенные посты пропускаются
+    insert = connection.ops.insert_statement(ignore_conflicts=True)
+    suffix = connection.ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{insert} {feed} (user_id, post_id, pub_date) '
+            f'SELECT {follow}.user_id, {post}.id, {post}.pub_date '
+            f'FROM {follow} '
+            f'JOIN {post} ON {post}.author_id = {follow}.author_id '
+            f'WHERE {follow}.author_id = %s {suffix}',
+            [author_id],
+        )
+        return cursor.rowcount
+
+
+def rebuild():
+    """
+    Заново заполняет ленты всех подписчиков по текущим подпискам одним
+    INSERT ... SELECT. Нужен после массовой вставки без сигналов;
+    счётчики подписчиков к этому моменту должны быть пересчитаны.
+    """
+    FeedEntry.objects.all().delete()
+    feed, follow, post, stats = (
+        model._meta.db_table for model in (FeedEntry, Follow, Post, UserStats)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {feed} (user_id, post_id, pub_date) '
+            f'SELECT {follow}.user_id, {post}.id, {post}.pub_date '
+            f'FROM {follow} '
+            f'JOIN {post} ON {post}.author_id = {follow}.author_id '
+            f'JOIN {stats} ON {stats}.user_id = {follow}.author_id '
+            f'WHERE {stats}.followers_count <= %s',
+            [settings.FEED_FANOUT_LIMIT],
+        )
+        return cursor.rowcount
+
+
+def fan_out_on_read_authors(user):
+    """Авторы из подписок, чьи посты не раскладываются по лентам."""
+    return list(
+        Follow.objects.filter(
+            user=user,
+            author__stats__followers_count__gt=settings.FEED_FANOUT_LIMIT,
+        ).values_list('author_id', flat=True)
+    )
+
+
+def paginate_feed(request, user):
+    """Страница ленты подписок пользователя."""
+    popular_authors = fan_out_on_read_authors(user)
+    if popular_authors:
+        posts = Post.objects.filter(
+            Q(pk__in=FeedEntry.objects.filter(user=user).values('post'))
+            | Q(author__in=popular_authors)
+        ).select_related('author', 'group')
+        return paginate_page(request, posts)
+    entries = FeedEntry.objects.filter(user=user).select_related(
+        'post__author', 'post__group'
+    )
+    page = paginate_page(
+        request, entries, ordering=('-pub_date', '-post_id')
+    )
+    page.object_list = [entry.post for entry in page.object_list]
+    return page
@@ -1,4 +1,6 @@
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
 
 from .models import Comment, Post
 
@@ -9,12 +11,42 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # данные слишком большого файла отброшены BoundedUploadHandler:
+        # убираем пустую заглушку, ошибку выдаст clean_image
+        self.image_oversized = getattr(
+            self.files.get('image'), 'oversized', False
+        )
+        if self.image_oversized:
+            self.files = self.files.copy()
+            del self.files['image']
+
     def clean_text(self):
         text = self.cleaned_data['text']
         if not text:
             raise forms.ValidationError('Пост не может быть пустым')
         return text
 
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if self.image_oversized:
+            raise forms.ValidationError(
+                'Файл больше %s' % filesizeformat(
+                    settings.POST_IMAGE_MAX_BYTES
+                )
+            )
+        # ImageField прочитал только заголовок картинки, пиксели
+        # декодируются позже, при создании миниатюр
+        header = getattr(image, 'image', None)
+        if header is not None:
+            width, height = header.size
+            if width * height > settings.POST_IMAGE_MAX_PIXELS:
+                raise forms.ValidationError(
+                    f'Картинка {width}x{height} слишком большая'
+                )
+        return image
+
 
 class CommentForm(forms.ModelForm):
     """Форма добавления комментария"""
@@ -0,0 +1,58 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def _init_worker():
+    # при запуске через spawn процессу нужно заново настроить Django
+    django.setup()
+
+
+def _warm(names):
+    return sum(thumbnails.generate(name) for name in names)
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры картинок всех постов параллельно на всех ядрах'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Число процессов; 0 — работать в текущем процессе',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+            help='Количество картинок в одном задании процесса',
+        )
+
+    def handle(self, *args, **options):
+        names = list(
+            Post.objects.exclude(image='')
+            .order_by()
+            .values_list('image', flat=True)
+            .distinct()
+        )
+        size = options['chunk_size']
+        chunks = [names[i:i + size] for i in range(0, len(names), size)]
+        if options['workers']:
+            # дочерние процессы не должны делить подключения родителя
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options['workers'], initializer=_init_worker
+            ) as executor:
+                done = sum(executor.map(_warm, chunks))
+        else:
+            done = sum(map(_warm, chunks))
+        self.stdout.write(
+            f'Миниатюры готовы для {done} из {len(names)} картинок'
+        )
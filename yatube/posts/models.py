@@ -20,6 +20,12 @@ class Group(models.Model):
         verbose_name='Описание',
         help_text='Информация о группе'
     )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество постов',
+        help_text='Поддерживается сигналами, см. posts.counters'
+    )
 
     def __str__(self) -> str:
         return self.title
@@ -58,9 +64,32 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+        help_text='Меняется и при изменении автора или группы поста'
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев',
+        help_text='Поддерживается сигналами, см. posts.counters'
+    )
 
     class Meta:
         ordering = ['-pub_date']
+        # индексы повторяют фильтр и сортировку лент: страница читается
+        # подряд из индекса без шага сортировки
+        indexes = [
+            models.Index(
+                name='post_group_pub_date_idx',
+                fields=['group', '-pub_date', '-id'],
+            ),
+            models.Index(
+                name='post_author_pub_date_idx',
+                fields=['author', '-pub_date', '-id'],
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -93,6 +122,14 @@ class Comment(models.Model):
         db_index=True
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                name='comment_post_created_idx',
+                fields=['post', 'created', 'id'],
+            ),
+        ]
+
     def __str__(self):
         return self.text[:15]
 
@@ -125,6 +162,80 @@ class Follow(models.Model):
                 name='non_self_follow'
             )
         ]
+        # подписчики автора: раскладка ленты и счётчики
+        indexes = [
+            models.Index(
+                name='follow_author_user_idx',
+                fields=['author', 'user'],
+            ),
+        ]
 
     def __str__(self):
         return self.user.username
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+        help_text='Пользователь, к которому относятся счётчики'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписок'
+    )
+
+    def __str__(self):
+        return f'{self.user_id}: {self.posts_count}'
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты подписок."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Читатель',
+        help_text='Пользователь, в ленту которого попал пост'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пост',
+        help_text='Пост автора, на которого подписан читатель'
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+        help_text='Копия даты публикации поста для сортировки ленты'
+    )
+
+    class Meta:
+        ordering = ['-pub_date', '-post_id']
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_feed_entry',
+                fields=['user', 'post'],
+            ),
+        ]
+        indexes = [
+            models.Index(
+                name='feed_user_pub_date_idx',
+                fields=['user', '-pub_date', '-post'],
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.post_id}'
@@ -0,0 +1,190 @@
+"""
+Полнотекстовый поиск по постам.
+
+Бэкенд задаётся настройкой POSTS_SEARCH_BACKEND. FTS5Backend ищет по
+инвертированному индексу posts_post_fts (миграция 0022), который
+повторяет Post.text и Group.title и обновляется триггерами; результаты
+ранжируются по bm25. LikeBackend — запасной вариант для баз без FTS5.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+WORD_RE = re.compile(r'\w+')
+# Слов в запросе не больше: длинный запрос не должен тормозить индекс
+MAX_TERMS: int = 8
+# Маркеры подсветки: не встречаются в тексте и не экранируются
+MARK_START = '\x02'
+MARK_END = '\x03'
+ELLIPSIS = '…'
+# Длина фрагмента: в словах для FTS5 и в символах для LIKE
+SNIPPET_TOKENS: int = 16
+SNIPPET_CHARS: int = 120
+
+
+def terms(query):
+    return WORD_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и превращает маркеры в <mark>."""
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+class FTS5Backend:
+    """Поиск по индексу FTS5 с ранжированием bm25."""
+    def is_available(self):
+        return connection.vendor == 'sqlite'
+
+    def match(self, query):
+        """
+        Запрос FTS5 из слов пользователя: все слова обязательны,
+        последнее ищется по префиксу. Кавычки исключают операторы.
+        """
+        words = [f'"{word}"' for word in terms(query)]
+        if words:
+            words[-1] += '*'
+        return ' '.join(words)
+
+    def filter(self, queryset, query):
+        """Посты queryset, подходящие под запрос, без ранжирования."""
+        # pk__in=RawSQL(...) даёт IN ((SELECT ...)), и SQLite берёт
+        # из подзапроса только первую строку
+        return queryset.extra(
+            where=[
+                f'{Post._meta.db_table}.id IN (SELECT rowid '
+                'FROM posts_post_fts WHERE posts_post_fts MATCH %s)'
+            ],
+            params=[self.match(query)],
+        )
+
+    def count(self, query, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT count(*) FROM (SELECT 1 FROM posts_post_fts '
+                'WHERE posts_post_fts MATCH %s LIMIT %s)',
+                [self.match(query), limit],
+            )
+            return cursor.fetchone()[0]
+
+    def hits(self, query, offset, limit):
+        """Пары (id поста, фрагмент с маркерами) по убыванию релевантности."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT rowid, snippet(posts_post_fts, -1, %s, %s, %s, %s) '
+                'FROM posts_post_fts WHERE posts_post_fts MATCH %s '
+                'ORDER BY rank LIMIT %s OFFSET %s',
+                [
+                    MARK_START, MARK_END, ELLIPSIS, SNIPPET_TOKENS,
+                    self.match(query), limit, offset,
+                ],
+            )
+            return cursor.fetchall()
+
+
+class LikeBackend:
+    """Поиск через LIKE: медленный, но работает в любой базе."""
+    def is_available(self):
+        return True
+
+    def filter(self, queryset, query):
+        condition = Q()
+        for word in terms(query):
+            condition &= (
+                Q(text__icontains=word) | Q(group__title__icontains=word)
+            )
+        return queryset.filter(condition)
+
+    def posts(self, query):
+        return self.filter(Post.objects.all(), query).order_by(
+            '-pub_date', '-pk'
+        )
+
+    def count(self, query, limit):
+        return self.posts(query)[:limit].count()
+
+    def hits(self, query, offset, limit):
+        words = terms(query)
+        rows = self.posts(query).values_list('pk', 'text')
+        return [
+            (pk, self.snippet(text, words))
+            for pk, text in rows[offset:offset + limit]
+        ]
+
+    def snippet(self, text, words):
+        lower = text.lower()
+        found = [lower.find(word) for word in words if word in lower]
+        start = max(min(found, default=0) - SNIPPET_CHARS // 4, 0)
+        end = start + SNIPPET_CHARS
+        fragment = re.sub(
+            '|'.join(map(re.escape, words)),
+            lambda match: MARK_START + match.group() + MARK_END,
+            text[start:end],
+            flags=re.IGNORECASE,
+        )
+        prefix = ELLIPSIS if start else ''
+        suffix = ELLIPSIS if end < len(text) else ''
+        return prefix + fragment + suffix
+
+
+class SearchResults:
+    """
+    Ленивый результат поиска для Paginator: count() ограничен
+    POSTS_SEARCH_MAX_RESULTS, срез запрашивает у бэкенда одну страницу.
+    """
+    def __init__(self, backend, query):
+        self.backend = backend
+        self.query = query
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(
+                self.query, settings.POSTS_SEARCH_MAX_RESULTS
+            ) if terms(self.query) else 0
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = min(index.stop or self.count(), self.count())
+        if start >= stop:
+            return []
+        hits = self.backend.hits(self.query, start, stop - start)
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [pk for pk, snippet in hits]
+        )
+        results = []
+        for pk, snippet in hits:
+            # пост мог быть удалён между запросами
+            if pk in posts:
+                posts[pk].snippet = highlight(snippet)
+                results.append(posts[pk])
+        return results
+
+
+def get_backend():
+    backend = import_string(settings.POSTS_SEARCH_BACKEND)()
+    if not backend.is_available():
+        return LikeBackend()
+    return backend
+
+
+def search(query):
+    """Посты, подходящие под запрос, по убыванию релевантности."""
+    return SearchResults(get_backend(), query)
@@ -0,0 +1,143 @@
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import counters, events, feed, thumbnails
+from .cache import bump_generation
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+# Обработчики вызываются в порядке объявления: счётчики обновляются
+# первыми, на них опирается раскладка ленты
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_saved_post(sender, instance, raw, **kwargs):
+    """Запоминает прежние группу и картинку изменяемого поста."""
+    if not raw and not instance._state.adding:
+        instance._saved_group_id, instance._saved_image = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', 'image')
+            .first()
+        ) or (None, '')
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.post_added(instance)
+    elif hasattr(instance, '_saved_group_id'):
+        counters.post_moved(instance._saved_group_id, instance.group_id)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    counters.post_removed(instance)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        counters.change_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    counters.change_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        counters.follow_changed(instance, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.follow_changed(instance, -1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw, **kwargs):
+    """Новый пост попадает в ленты подписчиков автора."""
+    if created and not raw:
+        feed.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def announce_post(sender, instance, created, raw, **kwargs):
+    """Новый пост будит открытые потоки событий подписчиков автора."""
+    if created and not raw:
+        author_id = instance.author_id
+        transaction.on_commit(lambda: events.broker.publish(author_id))
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, raw, **kwargs):
+    """Новая подписка заполняет ленту постами автора."""
+    if created and not raw:
+        feed.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_feed(sender, instance, **kwargs):
+    """
+    Отписка убирает посты автора из ленты; автор, вернувшийся к лимиту
+    раскладки, снова раскладывается по лентам оставшихся подписчиков.
+    """
+    feed.prune(instance.user_id, instance.author_id)
+    feed.catch_up(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_listings(sender, update_fields=None, **kwargs):
+    """Изменение контента сбрасывает кеш страниц со списками постов."""
+    if update_fields and set(update_fields) == {'last_login'}:
+        # вход пользователя на страницах не отображается
+        return
+    bump_generation()
+
+
+@receiver(post_save, sender=User)
+def touch_author_posts(sender, instance, created, update_fields=None,
+                       **kwargs):
+    """Имя автора есть в карточках его постов: сдвигаем Post.updated."""
+    if created or (update_fields and set(update_fields) == {'last_login'}):
+        return
+    Post.objects.filter(author=instance).update(updated=timezone.now())
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def touch_group_posts(sender, instance, **kwargs):
+    """Изменение или удаление группы меняет карточки её постов."""
+    Post.objects.filter(group=instance).update(updated=timezone.now())
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance, created, raw, **kwargs):
+    """Новая картинка отправляется на генерацию миниатюр."""
+    if raw or not instance.image:
+        return
+    if created or instance.image.name != getattr(
+        instance, '_saved_image', None
+    ):
+        name = instance.image.name
+        transaction.on_commit(lambda: thumbnails.enqueue(name))
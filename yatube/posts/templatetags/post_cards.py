@@ -0,0 +1,40 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post_list.html'
+
+
+def card_key(post):
+    """Ключ карточки меняется вместе с Post.updated."""
+    return f'post_card:{post.pk}:{post.updated.timestamp()}'
+
+
+@register.simple_tag
+def post_cards(posts):
+    """
+    Отрисованные карточки постов страницы: берутся из кеша одним
+    get_many, недостающие рендерятся и сохраняются одним set_many.
+    """
+    keys = {post.pk: card_key(post) for post in posts}
+    cached = cache.get_many(keys.values())
+    cards = {}
+    rendered = {}
+    for post in posts:
+        html = cached.get(keys[post.pk])
+        if html is None:
+            html = render_to_string(CARD_TEMPLATE, {'post': post})
+            rendered[keys[post.pk]] = html
+        cards[post.pk] = mark_safe(html)
+    if rendered:
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+    return cards
+
+
+@register.simple_tag
+def post_card(cards, post):
+    return cards[post.pk]
@@ -0,0 +1,68 @@
+import logging
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.conf import settings as sorl_settings
+
+from ..thumbnails import MIME_TYPES, geometry, modern_formats, picture_key
+
+logger = logging.getLogger(__name__)
+
+register = template.Library()
+
+
+def _srcset(image, format_=None):
+    options = {'format': format_} if format_ else {}
+    thumbnails = [
+        get_thumbnail(image, geometry(width), upscale=True, **options)
+        for width in settings.POST_IMAGE_WIDTHS
+    ]
+    return thumbnails, ', '.join(
+        f'{thumbnail.url} {thumbnail.width}w' for thumbnail in thumbnails
+    )
+
+
+def _variants(image):
+    """Адреса и размеры всех вариантов картинки для <picture>."""
+    sources = []
+    for format_ in modern_formats():
+        thumbnails, srcset = _srcset(image, format_)
+        sources.append({'type': MIME_TYPES[format_], 'srcset': srcset})
+    thumbnails, srcset = _srcset(image)
+    fallback = thumbnails[-1]
+    return {
+        'sources': sources,
+        'fallback': {
+            'url': fallback.url,
+            'width': fallback.width,
+            'height': fallback.height,
+        },
+        'srcset': srcset,
+        'sizes': f'(max-width: {fallback.width}px) 100vw, '
+                 f'{fallback.width}px',
+    }
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def picture(image, css_class='card-img my-2', loading='lazy'):
+    """
+    <picture> с вариантами картинки разной ширины и формата. Варианты
+    берутся из кеша одним запросом, sorl опрашивается только при промахе.
+    """
+    if not image:
+        return {}
+    key = picture_key(image.name)
+    variants = cache.get(key)
+    if variants is None:
+        try:
+            variants = _variants(image)
+        except Exception:
+            # как и {% thumbnail %}: битая картинка не роняет страницу
+            if sorl_settings.THUMBNAIL_DEBUG:
+                raise
+            logger.exception('Не удалось подготовить варианты %s', image)
+            return {}
+        cache.set(key, variants, settings.POST_PICTURE_CACHE_TIMEOUT)
+    return {**variants, 'css_class': css_class, 'loading': loading}
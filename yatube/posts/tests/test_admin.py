@@ -0,0 +1,109 @@
+import re
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.queries import QueryRecorder
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTest(TestCase):
+    """TestCase для списка постов в админке"""
+    POSTS: int = 150
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        posts = Post.objects.bulk_create(
+            Post(
+                author=cls.admin, group=cls.group, text=f'Пост номер {number}'
+            )
+            for number in range(cls.POSTS)
+        )
+        # auto_now_add не даёт задать дату при создании
+        now = timezone.now()
+        for number, post in enumerate(posts):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(days=number * 3)
+            )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def shown(self, response):
+        return [post.pk for post in response.context['cl'].result_list]
+
+    def test_changelist_without_count(self):
+        """Список открывается без COUNT(*) по всей таблице"""
+        with QueryRecorder() as recorder:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        counts = [sql for sql, _ in recorder.queries if 'COUNT(' in sql]
+        self.assertEqual(counts, [], 'Список постов считает строки')
+
+    def test_cursor_pages(self):
+        """Страницы листаются по курсору и не пересекаются"""
+        response = self.client.get(self.url)
+        first = self.shown(response)
+        next_url = response.context['cl'].next_url
+        self.assertIsNotNone(next_url, 'Нет ссылки на следующую страницу')
+        second = self.shown(self.client.get(self.url + next_url))
+        self.assertEqual(len(first) + len(second), self.POSTS)
+        self.assertFalse(set(first) & set(second), 'Страницы пересекаются')
+        self.assertContains(response, next_url.replace('&', '&amp;'))
+
+    def test_sorted_by_column(self):
+        """Сортировка по столбцу работает с обычной пагинацией"""
+        response = self.client.get(self.url + '?o=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['cl'].keyset)
+
+    def test_date_hierarchy(self):
+        """Годы и месяцы date_hierarchy находятся по индексу"""
+        response = self.client.get(self.url)
+        years = sorted({
+            post.pub_date.year for post in Post.objects.only('pub_date')
+        })
+        self.assertEqual(
+            sorted({int(year) for year in re.findall(
+                r'pub_date__year=(\d+)', response.content.decode()
+            )}),
+            years,
+        )
+        year = years[-1]
+        response = self.client.get(f'{self.url}?pub_date__year={year}')
+        months = sorted({
+            post.pub_date.month
+            for post in Post.objects.filter(pub_date__year=year)
+        })
+        self.assertEqual(
+            sorted({int(month) for month in re.findall(
+                r'pub_date__month=(\d+)', response.content.decode()
+            )}),
+            months,
+        )
+
+    def test_search_uses_index(self):
+        """Поиск в админке находит посты по индексу и префиксу"""
+        response = self.client.get(self.url + '?q=номер 7')
+        self.assertCountEqual(
+            self.shown(response),
+            Post.objects.filter(text__regex=r' 7\d?$').values_list(
+                'pk', flat=True
+            ),
+        )
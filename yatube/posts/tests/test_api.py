@@ -0,0 +1,127 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.tests.utils import QueryBudgetMixin
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ApiTest(QueryBudgetMixin, TestCase):
+    """TestCase для JSON API v1"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {number}')
+            for number in range(15)
+        )
+        cls.post = Post.objects.latest('pk')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.reader, text=f'Ответ {number}')
+            for number in range(3)
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        cache.clear()
+
+    def get_json(self, url, client=None, status=HTTPStatus.OK):
+        response = self.assertWithinQueryBudget(client or self.client, url)
+        self.assertEqual(response.status_code, status, url)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return response.json()
+
+    def test_posts_cursor_pagination(self):
+        """Посты листаются курсором без повторов и пропусков"""
+        url = reverse('api:posts')
+        first = self.get_json(url)
+        self.assertEqual(len(first['results']), 10)
+        self.assertIsNone(first['previous'])
+        self.assertEqual(first['results'][0]['id'], self.post.id)
+        self.assertEqual(first['results'][0]['author'], 'author')
+        self.assertEqual(first['results'][0]['group'], 'group')
+        second = self.get_json(first['next'])
+        self.assertIsNone(second['next'])
+        ids = [row['id'] for row in first['results'] + second['results']]
+        self.assertEqual(
+            ids,
+            list(Post.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )),
+            'Страницы API пропускают или повторяют посты'
+        )
+
+    def test_fields_projection(self):
+        """?fields= оставляет в ответе и в SELECT только выбранные поля"""
+        url = reverse('api:posts') + '?fields=text&limit=2'
+        with self.assertNumQueries(1) as context:
+            data = self.client.get(url).json()
+        self.assertEqual(data['results'], [
+            {'text': 'Пост 14'}, {'text': 'Пост 13'},
+        ])
+        sql = context.captured_queries[0]['sql']
+        self.assertNotIn('auth_user', sql, 'Автор присоединён без нужды')
+        self.assertNotIn('"image"', sql, 'Выбраны лишние столбцы')
+
+    def test_unknown_field(self):
+        """Неизвестное поле в ?fields= — ошибка 400"""
+        data = self.get_json(
+            reverse('api:posts') + '?fields=text,password',
+            status=HTTPStatus.BAD_REQUEST,
+        )
+        self.assertIn('password', data['detail'])
+
+    def test_groups_and_group_posts(self):
+        """Список групп и посты группы"""
+        data = self.get_json(reverse('api:groups'))
+        self.assertEqual(data['results'][0]['slug'], 'group')
+        data = self.get_json(
+            reverse('api:group_posts', kwargs={'slug': 'group'})
+        )
+        self.assertEqual(data['group']['title'], 'Группа')
+        self.assertEqual(len(data['results']), 10)
+        data = self.get_json(
+            reverse('api:group_posts', kwargs={'slug': 'missing'}),
+            status=HTTPStatus.NOT_FOUND,
+        )
+        self.assertIn('detail', data)
+
+    def test_profile(self):
+        """Профиль возвращает автора со счётчиками и его посты"""
+        data = self.get_json(
+            reverse('api:profile', kwargs={'username': 'author'})
+            + '?fields=id'
+        )
+        self.assertEqual(data['author']['username'], 'author')
+        self.assertEqual(data['author']['followers_count'], 1)
+        self.assertEqual(data['results'][0], {'id': self.post.id})
+
+    def test_post_detail_with_comments(self):
+        """Пост отдаётся вместе со страницей комментариев"""
+        data = self.get_json(
+            reverse('api:post_detail', kwargs={'post_id': self.post.id})
+        )
+        self.assertEqual(data['post']['text'], self.post.text)
+        self.assertEqual(
+            [row['text'] for row in data['comments']['results']],
+            ['Ответ 0', 'Ответ 1', 'Ответ 2'],
+        )
+        self.assertEqual(data['comments']['results'][0]['author'], 'reader')
+
+    def test_follow_feed(self):
+        """Лента подписок доступна только авторизованным"""
+        url = reverse('api:follow')
+        self.get_json(url, status=HTTPStatus.UNAUTHORIZED)
+        data = self.get_json(url, client=self.reader_client)
+        self.assertEqual(data['results'][0]['id'], self.post.id)
+        self.assertEqual(data['results'][0]['author'], 'author')
+        self.assertIsNotNone(data['next'])
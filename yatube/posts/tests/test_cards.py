@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..cache import bump_generation
+from ..models import Group, Post
+
+User = get_user_model()
+
+CARD_TEMPLATE = 'posts/includes/post_list.html'
+
+
+class PostCardCacheTest(TestCase):
+    """TestCase для кеша карточек постов"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Тестовый пост'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def get_index(self):
+        # сдвигаем поколение, чтобы страница собиралась заново
+        bump_generation()
+        return self.guest_client.get(reverse('posts:index'))
+
+    def test_cards_are_reused(self):
+        """Карточка рендерится один раз и берётся из кеша"""
+        self.assertTemplateUsed(self.get_index(), CARD_TEMPLATE)
+        response = self.get_index()
+        self.assertTemplateNotUsed(
+            response,
+            CARD_TEMPLATE,
+            'Карточка поста рендерится повторно'
+        )
+        self.assertContains(response, 'Тестовый пост')
+
+    def test_author_rename_invalidates_card(self):
+        """Смена имени автора обновляет карточки его постов"""
+        self.get_index()
+        user = PostCardCacheTest.user
+        user.first_name = 'Николай'
+        user.save()
+        response = self.get_index()
+        self.assertTemplateUsed(response, CARD_TEMPLATE)
+        self.assertContains(response, 'Николай Толстой')
+
+    def test_group_delete_invalidates_card(self):
+        """Удаление группы обновляет карточки её постов"""
+        self.get_index()
+        Group.objects.filter(pk=PostCardCacheTest.group.pk).delete()
+        self.assertTemplateUsed(self.get_index(), CARD_TEMPLATE)
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class PostDetailCommentsTest(TestCase):
+    """TestCase для комментариев на странице поста"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        cls.url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.id}
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostDetailCommentsTest.user)
+
+    def add_comments(self, count):
+        start = Comment.objects.count()
+        commentators = [
+            User.objects.create_user(username=f'reader_{start + i}')
+            for i in range(count)
+        ]
+        Comment.objects.bulk_create(
+            Comment(
+                post=PostDetailCommentsTest.post,
+                author=author,
+                text=f'Комментарий {start + i}',
+            )
+            for i, author in enumerate(commentators)
+        )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url)
+        return len(queries)
+
+    def test_constant_number_of_queries(self):
+        """Число запросов не зависит от количества комментариев"""
+        self.add_comments(2)
+        expected = self.count_queries(PostDetailCommentsTest.url)
+        self.add_comments(settings.NUMB_OF_COMMENTS * 2)
+        self.assertEqual(
+            self.count_queries(PostDetailCommentsTest.url),
+            expected,
+            'На странице поста запросы выполняются для каждого комментария'
+        )
+
+    def test_comments_are_paginated(self):
+        """Комментарии выводятся страницами по курсору"""
+        self.add_comments(settings.NUMB_OF_COMMENTS + 1)
+        response = self.authorized_client.get(PostDetailCommentsTest.url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), settings.NUMB_OF_COMMENTS)
+        self.assertEqual(comments[0].text, 'Комментарий 0')
+        response = self.authorized_client.get(
+            PostDetailCommentsTest.url + f'?cursor={comments.next_cursor}'
+        )
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            [f'Комментарий {settings.NUMB_OF_COMMENTS}'],
+            'Следующая страница комментариев выводится неправильно'
+        )
@@ -0,0 +1,85 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    """TestCase для денормализованных счётчиков"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group_1 = Group.objects.create(
+            title='Группа 1', slug='group_1', description='Описание'
+        )
+        cls.group_2 = Group.objects.create(
+            title='Группа 2', slug='group_2', description='Описание'
+        )
+
+    def assertCounters(self, obj, **expected):
+        obj.refresh_from_db()
+        for field, value in expected.items():
+            with self.subTest(obj=obj, field=field):
+                self.assertEqual(
+                    getattr(obj, field),
+                    value,
+                    f'Счётчик {field} рассчитан неправильно'
+                )
+
+    def test_counters_follow_changes(self):
+        """Счётчики меняются вместе с данными"""
+        author, reader = CountersTest.author, CountersTest.reader
+        post = Post.objects.create(
+            author=author, group=CountersTest.group_1, text='Пост'
+        )
+        Comment.objects.create(post=post, author=reader, text='Коммент')
+        Follow.objects.create(user=reader, author=author)
+        self.assertCounters(
+            author.stats, posts_count=1, followers_count=1
+        )
+        self.assertCounters(reader.stats, following_count=1)
+        self.assertCounters(CountersTest.group_1, posts_count=1)
+        self.assertCounters(post, comments_count=1)
+        post.group = CountersTest.group_2
+        post.save()
+        self.assertCounters(CountersTest.group_1, posts_count=0)
+        self.assertCounters(CountersTest.group_2, posts_count=1)
+        Follow.objects.filter(user=reader).delete()
+        post.delete()
+        self.assertCounters(
+            author.stats, posts_count=0, followers_count=0
+        )
+        self.assertCounters(reader.stats, following_count=0)
+        self.assertCounters(CountersTest.group_2, posts_count=0)
+
+    def test_profile_uses_counter(self):
+        """Профиль не считает посты запросом COUNT"""
+        Post.objects.create(author=CountersTest.author, text='Пост')
+        response = Client().get(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+        self.assertContains(response, 'Всего постов: 1')
+
+    def test_recount_repairs_drift(self):
+        """Команда recount исправляет расхождения"""
+        Post.objects.bulk_create(
+            Post(author=CountersTest.author, text=f'Пост {i}')
+            for i in range(3)
+        )
+        UserStats.objects.filter(user=CountersTest.reader).delete()
+        out = StringIO()
+        call_command('recount', stdout=out)
+        self.assertIn('user.posts: исправлено строк — 1', out.getvalue())
+        self.assertCounters(CountersTest.author.stats, posts_count=3)
+        self.assertTrue(
+            UserStats.objects.filter(user=CountersTest.reader).exists(),
+            'Команда recount не создаёт недостающие строки счётчиков'
+        )
@@ -0,0 +1,158 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.asgi import WsgiBridge
+
+from ..events import Broker, broker
+from ..models import Follow, Post, User
+
+
+@override_settings(EVENTS_RECHECK=0.01, EVENTS_MAX_DURATION=5)
+class FollowEventsTest(TestCase):
+    """TestCase для уведомлений о новых постах ленты"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_page_opens_stream(self):
+        """Лента подключается к потоку событий с моментом отрисовки"""
+        before = time.time()
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        since = float(response.context['events_since'])
+        self.assertLessEqual(before, since)
+        self.assertContains(
+            response, f'{reverse("posts:follow_events")}?since='
+        )
+
+    def test_stream_counts_new_posts(self):
+        """Под WSGI поток сообщает число новых постов и закрывается"""
+        since = time.time()
+        Post.objects.create(author=self.author, text='Новый пост')
+        Post.objects.create(
+            author=User.objects.create_user(username='other'),
+            text='Пост чужого автора',
+        )
+        response = self.reader_client.get(
+            reverse('posts:follow_events'), {'since': since}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(
+            list(response.streaming_content),
+            [
+                f'retry: {settings.EVENTS_POLL_RETRY}\n\n'.encode(),
+                b'event: new_posts\ndata: 1\n\n',
+            ],
+            'Под WSGI поток должен закрываться после одной сверки'
+        )
+        response.close()
+
+    def test_guest_redirected(self):
+        """Поток событий доступен только после входа"""
+        response = self.client.get(reverse('posts:follow_events'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_broker(self):
+        """Публикация будит подписки на автора, отписка их убирает"""
+        local = Broker()
+        subscription = local.subscribe([self.author.id])
+        other = local.subscribe([self.reader.id])
+        local.publish(self.author.id)
+        self.assertTrue(subscription.wait(0))
+        self.assertFalse(other.wait(0))
+        local.unsubscribe(subscription)
+        local.unsubscribe(other)
+        self.assertEqual(dict(local._subscriptions), {})
+
+
+@override_settings(EVENTS_RECHECK=0.05, EVENTS_MAX_DURATION=5)
+class FollowEventsPublishTest(TransactionTestCase):
+    """TestCase для рассылки уведомлений после публикации поста"""
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def test_post_save_notifies_after_commit(self):
+        """Новый пост будит подписчиков автора после фиксации"""
+        subscription = broker.subscribe([self.author.id])
+        try:
+            Post.objects.create(author=self.author, text='Новый пост')
+            self.assertTrue(subscription.wait(0))
+        finally:
+            broker.unsubscribe(subscription)
+
+    def test_asgi_stream(self):
+        """ASGI-мост отдаёт событие и закрывает поток после отключения"""
+        client = Client()
+        client.force_login(self.reader)
+        cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+        application = WsgiBridge(threads=2)
+        received = []
+
+        async def scenario():
+            got_event = asyncio.Event()
+            requests = [{'type': 'http.request', 'body': b''}]
+
+            async def receive():
+                if requests:
+                    return requests.pop()
+                await got_event.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                received.append(message)
+                if b'data: 1' in message.get('body', b''):
+                    got_event.set()
+
+            await application(
+                {
+                    'type': 'http',
+                    'method': 'GET',
+                    'path': reverse('posts:follow_events'),
+                    'query_string': f'since={time.time()}'.encode(),
+                    'headers': [
+                        (b'host', b'localhost'),
+                        (
+                            b'cookie',
+                            f'{settings.SESSION_COOKIE_NAME}={cookie}'
+                            .encode(),
+                        ),
+                    ],
+                },
+                receive,
+                send,
+            )
+
+        async def publish_later():
+            await asyncio.sleep(0.2)
+            await asyncio.get_running_loop().run_in_executor(
+                application.executor,
+                lambda: Post.objects.create(author=self.author, text='Пост'),
+            )
+
+        async def main():
+            await asyncio.gather(scenario(), publish_later())
+
+        try:
+            asyncio.run(main())
+        finally:
+            application.executor.shutdown()
+        self.assertEqual(received[0]['status'], 200)
+        bodies = [message.get('body', b'') for message in received[1:]]
+        self.assertIn(b'event: new_posts\ndata: 0\n\n', bodies)
+        self.assertIn(b'event: new_posts\ndata: 1\n\n', bodies)
+        self.assertEqual(dict(broker._subscriptions), {})
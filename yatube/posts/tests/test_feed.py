@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+class FeedTest(TestCase):
+    """TestCase для ленты подписок"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(
+            author=cls.author, text='Пост до подписки'
+        )
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(FeedTest.reader)
+
+    def feed(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка заполняет ленту, отписка очищает"""
+        Follow.objects.create(user=FeedTest.reader, author=FeedTest.author)
+        self.assertEqual(
+            self.feed(),
+            [FeedTest.old_post],
+            'Старые посты автора не попали в ленту при подписке'
+        )
+        new_post = Post.objects.create(
+            author=FeedTest.author, text='Пост после подписки'
+        )
+        self.assertTrue(
+            FeedEntry.objects.filter(
+                user=FeedTest.reader, post=new_post
+            ).exists(),
+            'Новый пост не разложен по лентам подписчиков'
+        )
+        self.assertEqual(self.feed(), [new_post, FeedTest.old_post])
+        Follow.objects.filter(
+            user=FeedTest.reader, author=FeedTest.author
+        ).delete()
+        self.assertFalse(
+            FeedEntry.objects.filter(user=FeedTest.reader).exists(),
+            'После отписки посты автора остались в ленте'
+        )
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_popular_author_read_on_demand(self):
+        """Посты популярного автора подмешиваются при чтении ленты"""
+        Follow.objects.create(user=FeedTest.reader, author=FeedTest.author)
+        new_post = Post.objects.create(
+            author=FeedTest.author, text='Пост популярного автора'
+        )
+        self.assertFalse(
+            FeedEntry.objects.exists(),
+            'Посты популярного автора не должны раскладываться по лентам'
+        )
+        self.assertEqual(self.feed(), [new_post, FeedTest.old_post])
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_author_crosses_fanout_limit(self):
+        """Посты не пропадают, когда автор пересекает лимит раскладки"""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=other, author=FeedTest.author)
+        Follow.objects.create(user=FeedTest.reader, author=FeedTest.author)
+        popular_post = Post.objects.create(
+            author=FeedTest.author, text='Пост сверх лимита'
+        )
+        self.assertEqual(self.feed(), [popular_post, FeedTest.old_post])
+        Follow.objects.filter(user=other).delete()
+        self.assertEqual(
+            self.feed(),
+            [popular_post, FeedTest.old_post],
+            'После возврата автора к лимиту посты пропали из ленты'
+        )
+        self.assertEqual(
+            FeedEntry.objects.filter(user=FeedTest.reader).count(), 2
+        )
+        Follow.objects.create(user=other, author=FeedTest.author)
+        self.assertEqual(self.feed(), [popular_post, FeedTest.old_post])
@@ -0,0 +1,38 @@
+import time
+
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from ..cache import VersionedCacheMiddleware, get_generation
+
+
+@override_settings(PAGE_REBUILD_WAIT=0.2)
+class PageRebuildLockTest(TestCase):
+    """TestCase для блокировки пересборки страниц кеша"""
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:index')
+        self.middleware = VersionedCacheMiddleware(
+            key_prefix='index_page'
+        )
+
+    def lock_key(self):
+        request = RequestFactory().get(self.url)
+        request._cache_generation = get_generation()
+        return self.middleware._rebuild_lock(request)
+
+    def test_lock_released_after_rebuild(self):
+        """Блокировка снимается после сохранения страницы"""
+        self.assertEqual(Client().get(self.url).status_code, 200)
+        self.assertIsNone(cache.get(self.lock_key()))
+
+    def test_waits_for_lock_owner(self):
+        """Пока страницу собирает другой процесс, запрос ждёт"""
+        cache.add(self.lock_key(), 1, 30)
+        start = time.monotonic()
+        response = Client().get(self.url)
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertEqual(
+            response.status_code, 200, 'Без готовой страницы нет ответа'
+        )
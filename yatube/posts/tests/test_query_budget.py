@@ -0,0 +1,101 @@
+import os
+import random
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from faker import Faker
+from mixer.backend.django import mixer
+
+from core.tests.utils import QueryBudgetMixin
+
+from ..models import Comment, FeedEntry, Follow, Group, Post, User
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    """TestCase для бюджета SQL-запросов представлений"""
+    # количество постов в наборе данных
+    POSTS: int = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        fake = Faker('ru_RU')
+        Faker.seed(cls.POSTS)
+        rnd = random.Random(cls.POSTS)
+        cls.reader = mixer.blend(User, username='reader')
+        cls.authors = mixer.cycle(5).blend(User)
+        cls.groups = mixer.cycle(3).blend(Group)
+        # bulk_create не вызывает сигналы: Faker даёт пул текстов,
+        # из которого посты набираются без лишних затрат
+        texts = [fake.paragraph() for _ in range(100)]
+        Post.objects.bulk_create(
+            (
+                Post(
+                    author=rnd.choice(cls.authors),
+                    group=rnd.choice(cls.groups),
+                    text=rnd.choice(texts),
+                )
+                for _ in range(cls.POSTS)
+            )
+        )
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+        cls.post = Post.objects.latest('pk')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=author, text=fake.sentence())
+            for author in cls.authors
+        )
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        cache.clear()
+
+    def listing_urls(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.groups[0].slug}),
+            reverse(
+                'posts:profile', kwargs={'username': self.authors[0].username}
+            ),
+            reverse('posts:follow_index'),
+        )
+
+    def test_views_within_budget(self):
+        """Представления укладываются в бюджет запросов"""
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.reader).count(),
+            self.POSTS,
+            'Лента читателя заполнена не полностью'
+        )
+        detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}
+        )
+        for url in self.listing_urls() + (detail_url,):
+            for client in (Client(), self.reader_client):
+                with self.subTest(url=url, client=client):
+                    cache.clear()
+                    self.assertWithinQueryBudget(client, url)
+
+    def test_last_page_within_budget(self):
+        """Последняя страница по курсору укладывается в бюджет"""
+        for url in self.listing_urls():
+            with self.subTest(url=url):
+                page = self.reader_client.get(url).context['page_obj']
+                cursor = page.last_cursor or ''
+                self.assertWithinQueryBudget(
+                    self.reader_client, f'{url}?cursor={cursor}'
+                )
+
+
+class QueryBudget1kTest(QueryBudgetTest):
+    POSTS: int = 1000
+
+
+@skipUnless(
+    os.environ.get('QUERY_BUDGET_LARGE'),
+    'набор из 100k постов: задайте QUERY_BUDGET_LARGE=1'
+)
+class QueryBudget100kTest(QueryBudgetTest):
+    POSTS: int = 100000
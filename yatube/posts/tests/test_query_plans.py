@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from core.tests.utils import QueryPlanMixin
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class QueryPlanTest(QueryPlanMixin, TestCase):
+    """TestCase для планов запросов представлений"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = mixer.blend(User)
+        cls.reader = mixer.blend(User)
+        cls.group = mixer.blend(Group)
+        posts = [
+            Post.objects.create(author=cls.author, group=cls.group, text='x')
+            for _ in range(15)
+        ]
+        cls.post = posts[0]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.reader, text='Комментарий')
+            for _ in range(25)
+        )
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_views_use_indexes(self):
+        """Запросы представлений идут по индексам без сортировки"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': self.author.username}
+            ),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                response = self.assertQueriesUseIndexes(
+                    self.reader_client, url
+                )
+                page = (
+                    response.context.get('page_obj')
+                    or response.context['comments']
+                )
+                cache.clear()
+                self.assertQueriesUseIndexes(
+                    self.reader_client, f'{url}?cursor={page.next_cursor}'
+                )
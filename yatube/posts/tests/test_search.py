@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.tests.utils import QueryBudgetMixin
+
+from ..models import Group, Post
+from ..search import search
+
+User = get_user_model()
+
+
+class SearchTest(QueryBudgetMixin, TestCase):
+    """TestCase для поиска по постам"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Садоводы',
+            slug='garden',
+            description='Тестовое описание',
+        )
+        cls.often = Post.objects.create(
+            author=cls.user,
+            text='Томаты, томаты и ещё раз томаты на грядке',
+        )
+        cls.once = Post.objects.create(
+            author=cls.user,
+            text='Длинный рассказ о погоде, в конце которого '
+                 'упоминаются томаты <b>жирным</b>',
+            group=cls.group,
+        )
+
+    def found(self, query):
+        return [post.pk for post in search(query)[:10]]
+
+    def test_ranked_by_relevance(self):
+        """Посты с большим числом совпадений идут первыми"""
+        self.assertEqual(self.found('томаты'), [self.often.pk, self.once.pk])
+
+    def test_group_title_and_prefix(self):
+        """Ищется по названию группы и по началу последнего слова"""
+        self.assertEqual(self.found('садовод'), [self.once.pk])
+
+    def test_index_follows_changes(self):
+        """Индекс следует за правками постов и групп"""
+        Post.objects.filter(pk=self.often.pk).update(text='Огурцы')
+        self.assertEqual(self.found('томаты'), [self.once.pk])
+        self.assertEqual(self.found('огурцы'), [self.often.pk])
+        Group.objects.filter(pk=self.group.pk).update(title='Дачники')
+        self.assertEqual(self.found('дачники'), [self.once.pk])
+        Post.objects.filter(pk=self.once.pk).delete()
+        self.assertEqual(self.found('дачники'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        """Операторы FTS5 в запросе не ломают поиск"""
+        for query in ('"томаты', 'томаты OR', '*', 'NEAR(', '-'):
+            with self.subTest(query=query):
+                search(query).count()
+
+    def test_snippet_is_escaped_and_highlighted(self):
+        """Фрагмент экранирован, совпадения выделены"""
+        snippet = search('жирным')[0].snippet
+        self.assertIn('<mark>жирным</mark>', snippet)
+        self.assertIn('&lt;b&gt;', snippet)
+
+    @override_settings(POSTS_SEARCH_BACKEND='posts.search.LikeBackend')
+    def test_like_backend(self):
+        """Запасной бэкенд находит те же посты"""
+        self.assertCountEqual(
+            self.found('томаты'), [self.often.pk, self.once.pk]
+        )
+        self.assertIn('<mark>жирным</mark>', search('жирным')[0].snippet)
+
+    def test_search_page(self):
+        """Страница поиска показывает найденные посты"""
+        response = self.assertWithinQueryBudget(
+            Client(), reverse('posts:search') + '?q=томаты'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [self.often.pk, self.once.pk],
+        )
+
+    def test_search_page_without_results(self):
+        """Страница поиска сообщает, что ничего не найдено"""
+        response = Client().get(reverse('posts:search'), {'q': 'zzzz'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'По запросу «zzzz» ничего не найдено')
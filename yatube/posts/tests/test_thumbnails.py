@@ -0,0 +1,94 @@
+import re
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default, get_thumbnail
+
+from ..models import Post
+from ..templatetags import post_images
+from ..thumbnails import MIME_TYPES, modern_formats, variants
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class WarmThumbnailsTest(TestCase):
+    """TestCase для генерации миниатюр"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif', content=small_gif, content_type='image/gif'
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_warm_thumbnails_command(self):
+        """Команда создаёт миниатюры всех размеров из шаблонов"""
+        out = StringIO()
+        call_command('warm_thumbnails', workers=0, stdout=out)
+        self.assertIn('готовы для 1 из 1', out.getvalue())
+        with mock.patch.object(default.engine, 'get_image') as get_image:
+            for geometry, options in variants():
+                get_thumbnail(
+                    WarmThumbnailsTest.post.image, geometry, **options
+                )
+        get_image.assert_not_called()
+
+    def test_picture_srcset(self):
+        """Тег picture выводит все ширины и доступные форматы"""
+        html = Template(
+            '{% load post_images %}{% picture post.image %}'
+        ).render(Context({'post': WarmThumbnailsTest.post}))
+        srcset = re.search(r'<img [^>]*srcset="([^"]+)"', html).group(1)
+        self.assertEqual(
+            len(srcset.split(', ')),
+            len(settings.POST_IMAGE_WIDTHS),
+            'В srcset есть не все ширины картинки'
+        )
+        self.assertEqual(
+            html.count('<source'),
+            len(modern_formats()),
+            'Число <source> не совпадает с доступными форматами'
+        )
+        for format_ in modern_formats():
+            self.assertIn(MIME_TYPES[format_], html)
+
+    def test_picture_cached(self):
+        """Повторный показ картинки не обращается к sorl"""
+        cache.clear()
+        template = Template('{% load post_images %}{% picture post.image %}')
+        first = template.render(Context({'post': WarmThumbnailsTest.post}))
+        with mock.patch.object(post_images, 'get_thumbnail') as thumbnail:
+            second = template.render(
+                Context({'post': WarmThumbnailsTest.post})
+            )
+        thumbnail.assert_not_called()
+        self.assertEqual(first, second)
@@ -0,0 +1,86 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post
+from ..thumbnails import prepare
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_jpeg(size, exif=None):
+    buffer = BytesIO()
+    image = Image.new('RGB', size, 'white')
+    if exif is None:
+        image.save(buffer, 'JPEG')
+    else:
+        image.save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class UploadLimitsTest(TestCase):
+    """TestCase для ограничений загружаемых картинок"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(UploadLimitsTest.user)
+
+    def post_image(self, content):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(
+                    'photo.jpg', content, content_type='image/jpeg'
+                ),
+            },
+        )
+
+    @override_settings(POST_IMAGE_MAX_BYTES=1024)
+    def test_oversized_file_rejected(self):
+        """Файл больше лимита отклоняется формой"""
+        response = self.post_image(make_jpeg((400, 400)) + b'\0' * 2048)
+        self.assertFalse(Post.objects.exists(), 'Пост создан')
+        self.assertIn('image', response.context['form'].errors)
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100 * 100)
+    def test_too_many_pixels_rejected(self):
+        """Картинка с большим числом пикселей отклоняется формой"""
+        response = self.post_image(make_jpeg((200, 200)))
+        self.assertFalse(Post.objects.exists(), 'Пост создан')
+        self.assertIn('200x200', str(response.context['form'].errors))
+
+    @override_settings(POST_IMAGE_MAX_SIDE=100)
+    def test_prepare_strips_exif_and_downscales(self):
+        """Оригинал перекодируется без EXIF и с ограничением стороны"""
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        name = default_storage.save(
+            'posts/photo.jpg', ContentFile(make_jpeg((300, 150), exif))
+        )
+        self.assertTrue(prepare(name), 'Оригинал не перезаписан')
+        with default_storage.open(name) as file, Image.open(file) as image:
+            self.assertEqual(image.size, (100, 50))
+            self.assertFalse(image.getexif(), 'EXIF не удалён')
+        self.assertFalse(prepare(name), 'Готовый оригинал перезаписан')
@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post
+from ..utils import CursorPaginator, encode_cursor
+
+User = get_user_model()
+
+
+class CursorPaginatorTest(TestCase):
+    """TestCase для курсорной пагинации"""
+    # количество записей для занесения в БД
+    COUNT_OF_REC: int = 23
+    PER_PAGE: int = 5
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост номер {i}')
+            for i in range(cls.COUNT_OF_REC)
+        )
+        cls.expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True
+            )
+        )
+
+    def paginator(self):
+        return CursorPaginator(Post.objects.all(), self.PER_PAGE)
+
+    def test_forward_and_backward_walk(self):
+        """Проход вперёд и назад по курсорам выдаёт все посты по порядку"""
+        pages = []
+        page = self.paginator().get_cursor_page()
+        while True:
+            pages.append([post.pk for post in page])
+            if not page.has_next():
+                break
+            page = self.paginator().get_cursor_page(page.next_cursor)
+        self.assertEqual(
+            sum(pages, []),
+            self.expected,
+            'Курсорная пагинация теряет или дублирует посты'
+        )
+        backward = []
+        while page.has_previous():
+            page = self.paginator().get_cursor_page(page.previous_cursor)
+            backward.insert(0, [post.pk for post in page])
+        self.assertEqual(
+            backward,
+            pages[:-1],
+            'Переход на предыдущую страницу работает неправильно'
+        )
+
+    def test_last_and_invalid_cursor(self):
+        """Курсор последней страницы и повреждённый курсор"""
+        last = self.paginator().get_cursor_page(encode_cursor('p'))
+        self.assertEqual(
+            [post.pk for post in last],
+            self.expected[-self.PER_PAGE:],
+        )
+        self.assertFalse(last.has_next())
+        first = self.paginator().get_cursor_page('не-курсор')
+        self.assertEqual(
+            [post.pk for post in first],
+            self.expected[:self.PER_PAGE],
+            'Повреждённый курсор должен вести на первую страницу'
+        )
+
+    def test_no_count_query(self):
+        """Курсорная страница не выполняет COUNT(*) и OFFSET"""
+        cache.clear()
+        cursor = self.paginator().get_cursor_page().next_cursor
+        client = Client()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(
+                reverse('posts:index') + f'?cursor={cursor}'
+            )
+        self.assertEqual(
+            len(response.context['page_obj']), settings.NUMB_OF_POST
+        )
+        for query in queries.captured_queries:
+            with self.subTest(sql=query['sql']):
+                self.assertNotIn('COUNT(', query['sql'].upper())
+                self.assertNotIn('OFFSET', query['sql'].upper())
+
+    def test_tampered_cursor(self):
+        """Подделанные значения ключа ведут на первую страницу, а не в 500"""
+        cache.clear()
+        client = Client()
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('api:posts'),
+        )
+        cursors = (
+            encode_cursor('n', ['abc', 1]),
+            encode_cursor('n', ['2021-01-01T00:00:00+00:00', 'x']),
+            encode_cursor('p', [{'pub_date': 1}, 1]),
+        )
+        for url in urls:
+            for cursor in cursors:
+                with self.subTest(url=url, cursor=cursor):
+                    response = client.get(url, {'cursor': cursor})
+                    self.assertEqual(response.status_code, 200)
@@ -1,3 +1,4 @@
+import os
 import shutil
 import tempfile
 
@@ -9,6 +10,7 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from ..cache import get_stats
 from ..models import Follow, Group, Post
 
 User = get_user_model()
@@ -318,12 +320,15 @@ class PostViewTests(TestCase):
         changed_post = Post.objects.get(id=self.post.id)
         self.assertEqual(changed_post.text, changed_text)
 
+    @override_settings(
+        METRICS_DIR=os.path.join(TEMP_MEDIA_ROOT, 'metrics')
+    )
     def test_cache_index_page(self):
         """"Проверка работы кеша на главной странице"""
         response_0 = self.authorized_client.get('/')
+        with self.assertNumQueries(0):
+            response_1 = self.authorized_client.get('/')
         Post.objects.latest('pub_date').delete()
-        response_1 = self.authorized_client.get('/')
-        cache.clear()
         response_2 = self.authorized_client.get('/')
         self.assertEqual(
             response_0.content,
@@ -333,8 +338,14 @@ class PostViewTests(TestCase):
         self.assertNotEqual(
             response_1.content,
             response_2.content,
-            'После обновления кеша главная страница не обновляется'
+            'После удаления поста кеш главной страницы не сбрасывается'
+        )
+        self.assertEqual(
+            get_stats()['hits'],
+            1,
+            'Попадания в кеш главной страницы не учитываются'
         )
+        self.assertEqual(get_stats()['misses'], 2)
 
     def test_follow_index(self):
         """
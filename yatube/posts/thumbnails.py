@@ -0,0 +1,145 @@
+"""
+Варианты картинок постов и их заблаговременная генерация.
+
+Каждая картинка нарезается на несколько ширин (POST_IMAGE_WIDTHS) в
+формате по умолчанию и в современных форматах, которые умеет Pillow.
+Без предварительной генерации sorl-thumbnail создаёт миниатюру при
+первом показе поста, и декодирование оплачивает первый читатель.
+Поэтому все варианты создаются в фоновом пуле потоков сразу после
+сохранения картинки. Там же оригинал освобождается от EXIF и, если он
+больше POST_IMAGE_MAX_SIDE, уменьшается и перекодируется.
+
+Готовые адреса и размеры вариантов для тега picture хранятся в кеше
+(picture_key), чтобы показ поста не обращался к KV-хранилищу sorl
+за каждым вариантом.
+"""
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from PIL import Image, ImageOps
+from sorl.thumbnail import base, delete, get_thumbnail
+
+logger = logging.getLogger(__name__)
+
+# Пропорции области картинки в шаблонах (960x339)
+ASPECT_WIDTH: int = 960
+ASPECT_HEIGHT: int = 339
+
+# Форматы в порядке предпочтения; None — формат sorl по умолчанию
+MODERN_FORMATS = ('AVIF', 'WEBP')
+MIME_TYPES = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+}
+
+# sorl-thumbnail знает расширения только до WEBP
+base.EXTENSIONS.setdefault('AVIF', 'avif')
+
+
+def modern_formats():
+    """Современные форматы, для которых в Pillow есть кодировщик."""
+    Image.init()
+    return [format_ for format_ in MODERN_FORMATS if format_ in Image.SAVE]
+
+
+def geometry(width):
+    return f'{width}x{round(width * ASPECT_HEIGHT / ASPECT_WIDTH)}'
+
+
+def variants():
+    """Пары (геометрия, опции sorl) всех вариантов картинки."""
+    formats = [None] + modern_formats()
+    return [
+        (geometry(width), dict(upscale=True, **(
+            {'format': format_} if format_ else {}
+        )))
+        for width in settings.POST_IMAGE_WIDTHS
+        for format_ in formats
+    ]
+
+
+def picture_key(name):
+    """
+    Ключ вариантов картинки для тега picture. Зависит от набора ширин
+    и форматов: после их изменения старые записи не читаются.
+    """
+    version = ':'.join(
+        map(str, (*settings.POST_IMAGE_WIDTHS, *modern_formats()))
+    )
+    digest = hashlib.md5(f'{version}:{name}'.encode()).hexdigest()
+    return f'post_picture:{digest}'
+
+
+def prepare(name):
+    """
+    Убирает EXIF из оригинала и уменьшает его до POST_IMAGE_MAX_SIDE.
+    Возвращает True, если файл был перезаписан.
+    """
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    with default_storage.open(name) as file, Image.open(file) as image:
+        format_ = image.format
+        if not image.getexif() and max(image.size) <= max_side:
+            return False
+        # поворот из EXIF применяется к пикселям до удаления тега
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side))
+        image.info.pop('exif', None)
+        if format_ == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        buffer = BytesIO()
+        image.save(buffer, format_)
+    with default_storage.open(name, 'wb') as file:
+        file.write(buffer.getvalue())
+    # миниатюры, успевшие появиться из старого оригинала
+    delete(name, delete_file=False)
+    cache.delete(picture_key(name))
+    return True
+
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def generate(name):
+    """
+    Готовит оригинал и создаёт все миниатюры картинки,
+    уже готовые берутся из KV-хранилища.
+    """
+    try:
+        prepare(name)
+        for size, options in variants():
+            get_thumbnail(name, size, **options)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+        return False
+    return True
+
+
+def _generate_in_worker(name):
+    try:
+        return generate(name)
+    finally:
+        # поток пула живёт долго: не держим его подключения к БД
+        close_old_connections()
+
+
+def enqueue(name):
+    """Ставит генерацию миниатюр в очередь пула потоков."""
+    if not settings.THUMBNAIL_WORKERS:
+        return generate(name)
+    return get_executor().submit(_generate_in_worker, name)
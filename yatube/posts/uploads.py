@@ -0,0 +1,41 @@
+"""
+Ограничение размера загружаемых картинок.
+
+Обработчик стоит первым в FILE_UPLOAD_HANDLERS и пропускает данные
+файла дальше по цепочке, пока не превышен POST_IMAGE_MAX_BYTES. После
+этого куски файла отбрасываются, не попадая ни в память, ни во
+временный файл, а в request.FILES кладётся пустой файл с пометкой
+oversized — его отклоняет поле формы.
+"""
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class OversizedUpload(SimpleUploadedFile):
+    """Файл, данные которого отброшены из-за превышения лимита."""
+    oversized = True
+
+    def __init__(self, name, content_type, received):
+        super().__init__(name, b'', content_type)
+        self.received = received
+
+
+class BoundedUploadHandler(FileUploadHandler):
+    """Отбрасывает файлы больше POST_IMAGE_MAX_BYTES во время загрузки."""
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_BYTES:
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.received <= settings.POST_IMAGE_MAX_BYTES:
+            return None
+        return OversizedUpload(
+            self.file_name, self.content_type, self.received
+        )
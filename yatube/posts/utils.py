@@ -1,8 +1,181 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.db.models import Q
+
+# Направления перехода, закодированные в курсоре
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(ValueError):
+    """Курсор повреждён или не подходит к пагинатору."""
+
+
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        # DjangoJSONEncoder обрезает микросекунды, а они нужны для сравнения
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} нельзя сохранить в курсоре')
+
+
+def encode_cursor(direction, values=None):
+    """Упаковывает направление и значения ключа в непрозрачный токен."""
+    raw = json.dumps([direction, values], default=_to_json)
+    token = base64.urlsafe_b64encode(raw.encode())
+    return token.decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Распаковывает токен курсора, проверяя его структуру."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        direction, values = json.loads(raw.decode())
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise InvalidCursor(token)
+    if direction not in (NEXT, PREVIOUS):
+        raise InvalidCursor(token)
+    if values is not None and (
+        not isinstance(values, list) or len(values) != size
+    ):
+        raise InvalidCursor(token)
+    return direction, values
+
+
+class CursorPaginator(Paginator):
+    """
+    Пагинатор по ключу (keyset/seek): вместо COUNT(*) и OFFSET
+    страница выбирается условием «строго после последней записи»,
+    поэтому время запроса не зависит от глубины страницы.
+
+    Ключ задаётся полями сортировки, последнее поле должно быть
+    уникальным. Все поля сортируются в одном направлении.
+    """
+    def __init__(self, object_list, per_page,
+                 ordering=('-pub_date', '-pk'), **kwargs):
+        self.ordering = tuple(ordering)
+        self.fields = tuple(field.lstrip('-') for field in self.ordering)
+        self.descending = self.ordering[0].startswith('-')
+        self._num_pages = None
+        super().__init__(
+            object_list.order_by(*self.ordering), per_page, **kwargs
+        )
+
+    @property
+    def num_pages(self):
+        # у курсорной страницы нет общего числа страниц: хватает знания,
+        # есть ли страницы до и после текущей
+        if self._num_pages is not None:
+            return self._num_pages
+        return super().num_pages
+
+    def _key(self, row):
+        if isinstance(row, dict):
+            return [row[field] for field in self.fields]
+        return [getattr(row, field) for field in self.fields]
+
+    def _parse(self, values):
+        """Значения ключа из курсора, приведённые к типам полей."""
+        meta = self.object_list.model._meta
+        try:
+            return [
+                (meta.pk if field == 'pk' else meta.get_field(field))
+                .to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor(values)
+
+    def _seek(self, values, backwards):
+        """Условие «строго после ключа» в направлении обхода."""
+        lookup = 'lt' if self.descending != backwards else 'gt'
+        condition = Q()
+        for position, field in enumerate(self.fields):
+            step = Q(**{f'{field}__{lookup}': values[position]})
+            for previous, value in zip(self.fields, values[:position]):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def _reversed_ordering(self):
+        return tuple(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        )
+
+    def _set_cursors(self, page, has_previous, has_next):
+        rows = page.object_list
+        page.next_cursor = (
+            encode_cursor(NEXT, self._key(rows[-1]))
+            if has_next and rows else None
+        )
+        page.previous_cursor = (
+            encode_cursor(PREVIOUS, self._key(rows[0]))
+            if has_previous and rows else None
+        )
+        page.last_cursor = encode_cursor(PREVIOUS) if has_next else None
+        return page
+
+    def page(self, number):
+        """Обычная страница по номеру, дополненная курсорами."""
+        page = super().page(number)
+        page.object_list = list(page.object_list)
+        return self._set_cursors(
+            page, page.has_previous(), page.has_next()
+        )
+
+    def get_cursor_page(self, cursor=None):
+        """
+        Возвращает страницу по курсору. Пустой или повреждённый курсор
+        означает первую страницу, курсор без ключа — последнюю.
+        """
+        direction, values = NEXT, None
+        if cursor:
+            try:
+                direction, values = decode_cursor(cursor, len(self.fields))
+                if values is not None:
+                    values = self._parse(values)
+            except InvalidCursor:
+                direction, values = NEXT, None
+        backwards = direction == PREVIOUS
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, backwards))
+        if backwards:
+            queryset = queryset.order_by(*self._reversed_ordering())
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            if not has_more and values is not None:
+                # дошли до начала: показываем полную первую страницу
+                return self.get_cursor_page()
+            rows.reverse()
+            has_previous, has_next = has_more, values is not None
+        else:
+            has_previous, has_next = values is not None, has_more
+        # Номер условный: по нему Page отвечает на has_previous/has_next
+        number = 2 if has_previous else 1
+        self._num_pages = number + 1 if has_next else number
+        page = self._get_page(rows, number, self)
+        return self._set_cursors(page, has_previous, has_next)
 
 
-def paginate_page(request, posts):
-    paginator = Paginator(posts, settings.NUMB_OF_POST)
-    page_number = request.GET.get("page")
-    return paginator.get_page(page_number)
+def paginate_page(request, posts, per_page=None,
+                  ordering=('-pub_date', '-pk')):
+    """
+    Страница постов по курсору из ?cursor=. Старые ссылки вида ?page=N
+    продолжают работать через OFFSET.
+    """
+    paginator = CursorPaginator(
+        posts, per_page or settings.NUMB_OF_POST, ordering
+    )
+    page_number = request.GET.get('page')
+    if page_number is not None and 'cursor' not in request.GET:
+        return paginator.get_page(page_number)
+    return paginator.get_cursor_page(request.GET.get('cursor'))
@@ -1,14 +1,33 @@
+import time
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db.models import OuterRef, Subquery
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from django.views.decorators.cache import cache_page
 
+from core.queries import query_budget
+from core.routers import replica_safe
+
+from . import events
+from .cache import (
+    cache_listing, conditional_page, get_stats, listing_last_modified,
+    page_etag,
+)
+from .feed import paginate_feed
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Comment, Follow, Group, Post, User
+from .search import search as search_posts
 from .utils import paginate_page
 
 
-@cache_page(20, key_prefix='index_page')
+@query_budget(3)
+@replica_safe
+@conditional_page()
+@cache_listing('index_page')
 def index(request):
     """Главная страница сайта"""
     page_obj = paginate_page(
@@ -20,6 +39,10 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@query_budget(4)
+@replica_safe
+@conditional_page()
+@cache_listing('group_page')
 def group_posts(request, slug):
     """Посты группы"""
     group = get_object_or_404(Group, slug=slug)
@@ -33,9 +56,15 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@query_budget(5)
+@replica_safe
+@conditional_page()
+@cache_listing('profile_page')
 def profile(request, username):
     """Посты профиля"""
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
     page_obj = paginate_page(
         request, author.posts.select_related('group').all()
     )
@@ -51,14 +80,57 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+def post_validators(request, post_id):
+    """Дата правки поста, число и время последнего комментария."""
+    if not hasattr(request, '_post_validators'):
+        last_comment = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by('-created').values('created')[:1]
+        request._post_validators = Post.objects.filter(
+            pk=post_id
+        ).annotate(
+            last_comment=Subquery(last_comment)
+        ).values_list('updated', 'comments_count', 'last_comment').first()
+    return request._post_validators
+
+
+def post_etag(request, post_id):
+    validators = post_validators(request, post_id)
+    if validators is None:
+        return None
+    return page_etag(request, *validators)
+
+
+def post_last_modified(request, post_id):
+    validators = post_validators(request, post_id)
+    if validators is None:
+        return None
+    updated, comments_count, last_comment = validators
+    return max(
+        filter(None, (
+            updated, last_comment, listing_last_modified(request)
+        ))
+    )
+
+
+@query_budget(6)
+@replica_safe
+@conditional_page(post_etag, post_last_modified)
 def post_detail(request, post_id):
     """Информация о посте"""
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), id=post_id
+    )
     form = CommentForm()
-    comments = post.comments.all()
+    comments = paginate_page(
+        request,
+        post.comments.select_related('author'),
+        per_page=settings.NUMB_OF_COMMENTS,
+        ordering=('created', 'pk'),
+    )
     context = {
         'post': post,
-        'is_edit': post.author == request.user,
+        'is_edit': post.author_id == request.user.id,
         'form': form,
         'comments': comments
     }
@@ -118,20 +190,36 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@query_budget(4)
+@replica_safe
 @login_required
+@cache_listing('follow_page')
 def follow_index(request):
     """
     Страница с постами авторов, на
     которых подписан текущий пользователь
     """
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginate_page(request, posts)
+    # момент до чтения ленты: всё, что опубликовано позже, поток
+    # событий посчитает новыми постами
+    events_since = time.time()
+    page_obj = paginate_feed(request, request.user)
     context = {
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'events_since': f'{events_since:.6f}',
     }
     return render(request, 'posts/follow.html', context)
 
 
+@login_required
+def follow_events(request):
+    """Поток server-sent events с числом новых постов ленты"""
+    return events.EventStreamResponse(
+        events.EventStream(
+            request.user.id, events.parse_since(request.GET.get('since'))
+        )
+    )
+
+
 @login_required
 def profile_follow(request, username):
     """Подписаться на автора"""
@@ -158,3 +246,26 @@ def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect(reverse('posts:profile', kwargs={'username': username}))
+
+
+@query_budget(5)
+def search(request):
+    """Поиск по постам"""
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        page_obj = Paginator(
+            search_posts(query), settings.NUMB_OF_POST
+        ).get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'max_results': settings.POSTS_SEARCH_MAX_RESULTS,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@staff_member_required
+def cache_stats(request):
+    """Счётчики кеша страниц со списками постов"""
+    return JsonResponse(get_stats())
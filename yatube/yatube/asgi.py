@@ -0,0 +1,19 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Django 2.2 has no ASGI handler of its own, so requests are passed to the
+WSGI handler through ``core.asgi.WsgiBridge``, for example::
+
+    uvicorn yatube.asgi:application --workers 4
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import WsgiBridge
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = WsgiBridge(get_wsgi_application())
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -48,10 +50,15 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'benchmarks.apps.BenchmarksConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'core.queries.QueryBudgetMiddleware',
+    'core.routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,9 +70,13 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'yatube.urls'
 
+# Тесты идут с изменёнными настройками из core.testing
+TEST_RUNNER = 'core.testing.TestRunner'
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, учитывающий время отрисовки (см. core.metrics)
+        'BACKEND': 'core.metrics.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -90,9 +101,47 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # подключение переживает запрос и используется повторно
+        'CONN_MAX_AGE': int(os.environ.get('YATUBE_CONN_MAX_AGE', 600)),
     }
 }
 
+# Реплики только для чтения: пути к файлам SQLite через запятую.
+# Локально их наполняет manage.py sync_replicas
+for number, name in enumerate(
+    filter(None, os.environ.get('YATUBE_REPLICA_DBS', '').split(',')), 1
+):
+    DATABASES[f'replica{number}'] = dict(
+        DATABASES['default'],
+        NAME=name,
+        # в тестах реплика — та же база, что и default
+        TEST={'MIRROR': 'default'},
+    )
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Сколько секунд после записи клиент читает с основной базы
+REPLICA_STICKY_SECONDS: int = 10
+# Сколько секунд после изменения контента страницы со списками и
+# постами читаются из default: с отстающей реплики они закешировались
+# бы под новым поколением
+REPLICA_MAX_LAG: int = 10
+
+# Прагмы каждого нового подключения SQLite (см. core.db)
+SQLITE_PRAGMAS = {
+    # читатели не ждут писателя
+    'journal_mode': 'WAL',
+    # в WAL сбрасывать на диск только при контрольной точке
+    'synchronous': 'NORMAL',
+    # ожидание блокировки записи вместо ошибки database is locked, мс
+    'busy_timeout': 5000,
+    # чтение базы через отображение в память, байт
+    'mmap_size': 256 * 1024 * 1024,
+    # кеш страниц подключения; отрицательное значение — в КиБ
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -140,7 +189,24 @@ LOGIN_REDIRECT_URL = 'posts:index'
 
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма ставятся в очередь (core.mail) и отправляются командой
+# send_queued_mail бэкендом EMAIL_QUEUE_BACKEND; локально это файлы
+# в EMAIL_FILE_PATH, в рабочем окружении — SMTP
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+EMAIL_QUEUE_BACKEND = os.environ.get(
+    'YATUBE_EMAIL_BACKEND', 'django.core.mail.backends.filebased.EmailBackend'
+)
+# Сколько писем отправляется через одно подключение
+EMAIL_QUEUE_BATCH_SIZE: int = 50
+# Пауза воркера при пустой очереди, секунд
+EMAIL_QUEUE_POLL_INTERVAL: float = 5
+# Задержка после первой неудачи, секунд; дальше она удваивается до
+# EMAIL_QUEUE_MAX_RETRY_DELAY
+EMAIL_QUEUE_RETRY_DELAY: int = 60
+EMAIL_QUEUE_MAX_RETRY_DELAY: int = 60 * 60
+EMAIL_QUEUE_MAX_ATTEMPTS: int = 8
+# Сколько секунд письмо закреплено за воркером, который его отправляет
+EMAIL_QUEUE_LEASE: int = 5 * 60
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
@@ -149,18 +215,128 @@ REDIRECT_FIELD_NAME = '/admin/'
 # Ограничение по количеству выводимых постов
 NUMB_OF_POST: int = 10
 
+# Количество комментариев на странице поста
+NUMB_OF_COMMENTS: int = 20
+
+# Наибольший размер страницы JSON API (?limit=)
+API_MAX_PAGE_SIZE: int = 100
+
+# Поиск по постам и предел числа найденных постов
+POSTS_SEARCH_BACKEND = 'posts.search.FTS5Backend'
+POSTS_SEARCH_MAX_RESULTS: int = 1000
+
+# Предел точного подсчёта строк в списках админки
+ADMIN_COUNT_LIMIT: int = 10000
+
+# Посты авторов, у которых подписчиков больше этого числа, не копируются
+# в ленты подписчиков при публикации, а подмешиваются при чтении ленты
+FEED_FANOUT_LIMIT: int = 1000
+
+# Как часто поток событий ленты сверяет число новых постов с базой,
+# секунд: так находятся посты, опубликованные в других процессах
+EVENTS_RECHECK: float = 15
+# Через сколько секунд поток событий закрывается; браузер
+# переподключается сам через EVENTS_RETRY миллисекунд
+EVENTS_MAX_DURATION: int = 5 * 60
+EVENTS_RETRY: int = 3000
+# Под WSGI поток событий отдаёт одну сверку и закрывается, браузер
+# повторяет запрос через EVENTS_POLL_RETRY миллисекунд
+EVENTS_POLL_RETRY: int = 15000
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.BoundedUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Ограничения загружаемой картинки поста
+POST_IMAGE_MAX_BYTES: int = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS: int = 40_000_000
+# Большая сторона оригинала после перекодирования в фоне
+POST_IMAGE_MAX_SIDE: int = 2560
+
+# Ширины вариантов картинки поста для srcset
+POST_IMAGE_WIDTHS = (480, 720, 960)
+
+# Потоки фоновой генерации миниатюр; 0 — генерировать сразу в запросе
+THUMBNAIL_WORKERS: int = 2
+
+# Потоки, в которых ASGI-мост (yatube/asgi.py) выполняет запросы;
+# столько же запросов одного процесса одновременно обращаются к базе
+ASGI_THREADS: int = 8
+
+# Доля запросов, стеки которых снимаются сэмплером (см. core.profiling);
+# запрос с заголовком из manage.py profile_token профилируется всегда
+PROFILING_RATE: float = float(os.environ.get('YATUBE_PROFILING_RATE', 0))
+# Период снимков стека, секунд: меньше интервала переключения GIL
+# (5 мс) брать бессмысленно
+PROFILING_INTERVAL: float = 0.005
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+# Сколько последних профилей хранить для каждого представления
+PROFILING_MAX_FILES: int = 200
+# Срок действия подписанного заголовка, секунд
+PROFILING_TOKEN_MAX_AGE: int = 60 * 60
+
+# Каталог файлов со счётчиками запросов каждого процесса (см.
+# core.metrics); None — не собирать
+METRICS_DIR = os.environ.get(
+    'YATUBE_METRICS_DIR', os.path.join(BASE_DIR, 'metrics')
+)
+# Границы корзин гистограммы времени ответа, секунд
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Токен Prometheus для страницы /metrics/ (Authorization: Bearer);
+# без него страница доступна только персоналу
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN', '')
+
+# Кеш выбирается переменной окружения YATUBE_CACHE; оба бэкенда общие для
+# всех воркеров одного хоста. locmem не предлагается: поколение кеша
+# страниц (posts.cache) лежит в кеше, и с отдельным кешем у каждого
+# процесса воркеры отдавали бы страницы, устаревшие на сутки
+CACHE_BACKENDS = {
+    'file': {
+        'BACKEND': 'core.cache.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'files'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'sqlite': {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'cache.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+CACHE_BACKEND = os.environ.get('YATUBE_CACHE', 'sqlite')
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        f'YATUBE_CACHE={CACHE_BACKEND}: ожидается один из {", ".join(CACHE_BACKENDS)}'
+    )
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
 }
 
+# Пересборку страницы, которой нет в кеше, ведёт один процесс; остальные
+# ждут её готовности не дольше PAGE_REBUILD_WAIT секунд
+PAGE_REBUILD_LOCK_TIMEOUT: int = 30
+PAGE_REBUILD_WAIT: float = 2.0
+
+# Время жизни кеша страниц со списками постов; кеш сбрасывается
+# при любом изменении контента, поэтому срок может быть большим
+LISTING_CACHE_TIMEOUT: int = 60 * 60 * 24
+
+# Время жизни отрисованных карточек постов; ключ карточки включает
+# дату изменения поста, поэтому устаревшие карточки не читаются
+POST_CARD_CACHE_TIMEOUT: int = 60 * 60 * 24 * 7
+
+# Время жизни адресов вариантов картинки для тега picture; при
+# перезаписи оригинала запись удаляется (см. posts.thumbnails)
+POST_PICTURE_CACHE_TIMEOUT: int = 60 * 60 * 24 * 7
+
 if DEBUG:
     import mimetypes
     mimetypes.add_type("application/javascript", ".js", True)